@@ -0,0 +1,87 @@
+"""Check set_dynamic_probability_batch against the per-record scorer and time both.
+
+Timings compare score_extracted_batch with score_extracted looped over the
+same compact records, so the JSON conversion is out of both. Fuzzy name
+matching costs the same either way and dominates when on, so both modes are
+reported.
+
+    python benchmarks/bench_batch_scoring.py --entities 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import composits  # noqa: E402
+
+NAMES = ["KBBK SOLUTIONS", "BY ALL ACCOUNTS BOOKKEEPING", "KELLIE BICKERTON", "KELLEE BICKERTON", "ACME PTY LTD"]
+STATES = ["QLD", "Queensland", "NSW", "VIC"]
+
+
+def synthetic_payload(rng):
+    def record():
+        return {
+            "company_name": rng.choice(NAMES),
+            "Business Name": rng.choice(NAMES),
+            "State": rng.choice(STATES),
+            "ABN": rng.choice(["58453256019", "58453256019", "11111111111"]),
+        }
+
+    combined = {"abrData": record(), "tpbData": {"legal_name": rng.choice(NAMES), "Suburb": "STANTHORPE"}}
+    for source in ("quickbookData", "leiData", "xeroData"):
+        combined[source] = [record() for _ in range(rng.randint(0, 4))]
+    return {"combinedResults": combined}
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(entities, seed=7, repeat=3):
+    rng = random.Random(seed)
+    payloads = [synthetic_payload(rng) for _ in range(entities)]
+
+    extracted = [composits.extract_keys_from_sources(p) for p in payloads]
+    compact = [composits.extract_candidates(p) for p in payloads]
+
+    failed = False
+    for fuzzy in (False, True):
+        composits.FUZZY_NAME_MATCHING = fuzzy
+        expected = [composits.set_dynamic_probability(data) for data in extracted]
+        single_seconds, _ = best_of(lambda: [composits.score_extracted(c) for c in compact], repeat)
+        batch_seconds, batched = best_of(lambda: composits.score_extracted_batch(compact), repeat)
+        actual = [composits.scored_to_json(r) for r in batched]
+
+        mode = "fuzzy" if fuzzy else "exact"
+        print(f"{entities} entities {mode} scoring  per-record {single_seconds:.3f} s  "
+              f"batch {batch_seconds:.3f} s  ({single_seconds / batch_seconds:.2f}x)")
+        if composits.set_dynamic_probability_batch(payloads[:100]) != expected[:100]:
+            print("PARITY FAILED for set_dynamic_probability_batch")
+            failed = True
+        mismatches = [i for i, (a, b) in enumerate(zip(expected, actual))
+                      if list(a.items()) != list(b.items())]
+        if mismatches:
+            print(f"PARITY FAILED for {len(mismatches)} entities, first at index {mismatches[0]}")
+            failed = True
+    if failed:
+        return 1
+    print("parity OK")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs; the fastest is reported")
+    args = parser.parse_args()
+    sys.exit(run(args.entities, args.seed, args.repeat))
@@ -0,0 +1,63 @@
+"""Memory held by scored entities as Candidate records versus the JSON-shaped dicts.
+
+Scores the same synthetic payloads both ways and keeps every result alive,
+measuring the allocated size with tracemalloc.
+
+    python benchmarks/bench_candidate_memory.py --entities 50000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import composits  # noqa: E402
+from bench_batch_scoring import synthetic_payload  # noqa: E402
+
+
+def held_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return results, size, seconds
+
+
+def run(entities, seed=7):
+    rng = random.Random(seed)
+    payloads = [synthetic_payload(rng) for _ in range(entities)]
+    # Warm the postcode index and intern cache outside the measurement
+    composits.process_json_input(payloads[0])
+
+    compact, compact_size, compact_seconds = held_bytes(
+        lambda: [composits.score_extracted(composits.extract_candidates(p)) for p in payloads])
+    as_json, json_size, json_seconds = held_bytes(
+        lambda: [composits.process_json_input(p) for p in payloads])
+
+    if [composits.scored_to_json(result) for result in compact] != as_json:
+        print("compact results do not serialise to the JSON results")
+        return 1
+    items = sum(len(candidates) for result in compact for candidates in result.values())
+    print(f"{entities} entities, {items} scored values")
+    print(f"JSON dicts  {json_size / 2**20:8.1f} MiB  {json_size / items:6.1f} B/value  {json_seconds:.2f} s")
+    print(f"Candidate   {compact_size / 2**20:8.1f} MiB  {compact_size / items:6.1f} B/value  {compact_seconds:.2f} s")
+    print(f"saving {1 - compact_size / json_size:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(run(args.entities, args.seed))
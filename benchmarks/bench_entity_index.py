@@ -0,0 +1,120 @@
+"""Index synthetic extracted records and find planted duplicates.
+
+Each business is added once, and some are added again later under a new id
+with a reworded name (words reordered, legal form added or dropped, case
+changed), no ABN or another postcode. Names are drawn from a shared
+vocabulary, so many businesses have overlapping names. Reports add throughput,
+per-add latency, how many planted duplicates came back as the top candidate,
+and the cost of one pairwise scan of the corpus for comparison. A small
+book is run first: there legal-form words are rare enough to be looked up
+rather than skipped, so they must not count as name evidence.
+
+    python benchmarks/bench_entity_index.py --entities 200000 --duplicates 0.1 --db /tmp/entities.sqlite
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_index import EntityIndex, blocking_keys, score_candidates  # noqa: E402
+
+WORDS = ["KBBK", "SOLUTIONS", "BICKERTON", "ACCOUNTS", "BOOKKEEPING", "HOLDINGS", "STANTHORPE", "GRANITE",
+         "BELT", "ADVISORY", "TAX", "SERVICES", "PARTNERS", "GROUP", "TRUST"]
+SYLLABLES = ["KA", "RO", "MI", "TEN", "BEL", "OR", "DA", "VIN", "SU", "LAR", "NE", "TH", "QU", "ES", "PA", "WIL"]
+LEGAL_FORMS = ["", " PTY LTD", " PTY. LTD.", " LIMITED", " Pty Ltd"]
+
+
+def vocabulary(rng, size=6000):
+    # Common business words plus made-up surnames and place names
+    words = set(WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def business(rng, i, words):
+    name = " ".join(rng.sample(words, rng.randint(2, 3)))
+    return {
+        "ABN": [{"value": str(50000000000 + i * 7), "source": "abrData"}],
+        "Entity Name": [{"value": name + rng.choice(LEGAL_FORMS), "source": "abrData"}],
+        "Company Name": [{"value": name.title() + rng.choice(LEGAL_FORMS), "source": "quickbookData"}],
+        "Postal code": [{"value": str(rng.randint(2000, 7999)), "source": "abrData"}],
+    }
+
+
+def duplicate(record, rng):
+    # As another source would have it: one name spelling and no trading name
+    copy = {key: list(items) for key, items in record.items() if key != "Company Name"}
+    roll = rng.random()
+    if roll < 0.4:
+        del copy["ABN"]
+    elif roll < 0.7:
+        copy["Postal code"] = [{"value": str(rng.randint(2000, 7999)), "source": "tpbData"}]
+    words = [word for word in copy["Entity Name"][0]["value"].split() if word.upper().strip(".") not in ("PTY", "LTD", "LIMITED")]
+    rng.shuffle(words)
+    name = " ".join(words) + rng.choice(LEGAL_FORMS)
+    copy["Entity Name"] = [{"value": name.title() if rng.random() < 0.5 else name, "source": "tpbData"}]
+    return copy
+
+
+def run(entities, duplicate_share, db_path, seed=7):
+    rng = random.Random(seed)
+    if db_path and os.path.exists(db_path):
+        os.remove(db_path)
+    index = EntityIndex(db_path or ":memory:")
+
+    words = vocabulary(rng)
+    originals = [business(rng, i, words) for i in range(entities)]
+    planted = {f"dup-{i}": f"e{i}" for i in rng.sample(range(entities), int(entities * duplicate_share))}
+
+    start = time.perf_counter()
+    index.add_many((f"e{i}", record) for i, record in enumerate(originals))
+    load_seconds = time.perf_counter() - start
+
+    latencies, found = [], 0
+    for dup_id, original_id in planted.items():
+        record = duplicate(originals[int(original_id[1:])], rng)
+        start = time.perf_counter()
+        candidates = index.add(dup_id, record)
+        latencies.append(time.perf_counter() - start)
+        found += bool(candidates) and candidates[0]["entity_id"] == original_id
+
+    # One pairwise pass over a sample, scaled up to the whole corpus
+    sample = originals[:min(entities, 20000)]
+    sample_keys = [set(blocking_keys(record)) for record in sample]
+    probe = set(blocking_keys(duplicate(originals[0], rng)))
+    start = time.perf_counter()
+    for i, keys in enumerate(sample_keys):
+        shared = probe & keys
+        if shared:
+            score_candidates(probe, {key: {str(i): len(keys)} for key in shared})
+    pairwise_seconds = (time.perf_counter() - start) * entities / len(sample)
+
+    removed = all(index.remove(dup_id) for dup_id in list(planted)[:100])
+    latencies.sort()
+    print(f"{entities} entities loaded in {load_seconds:.2f} s ({entities / load_seconds:,.0f}/s), "
+          f"{len(index)} indexed after adds and removes")
+    if latencies:
+        print(f"add with candidates  p50 {latencies[len(latencies) // 2] * 1000:.2f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+        print(f"planted duplicates found as top candidate: {found}/{len(planted)}")
+    print(f"one pairwise scan of the corpus  ~{pairwise_seconds * 1000:.1f} ms")
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+    index.close()
+    return 0 if removed and found == len(planted) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=50000)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    parser.add_argument("--db", default="", help="SQLite file; in memory when empty")
+    parser.add_argument("--small-entities", type=int, default=500,
+                        help="also run on a book this small, where PTY and LTD stay under the posting limit")
+    args = parser.parse_args()
+    failed = run(args.small_entities, args.duplicates, "") if args.small_entities else 0
+    sys.exit(run(args.entities, args.duplicates, args.db) or failed)
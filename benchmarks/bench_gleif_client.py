@@ -0,0 +1,60 @@
+"""Fetch a multi-page result set from the mock GLEIF server and check it is complete.
+
+Runs with page concurrency 1 and then GLEIF_MAX_CONCURRENCY, with injected
+429s, and fails if any record is missing or out of order.
+
+    python benchmarks/bench_gleif_client.py --records 2000 --latency 0.05 --fail-every 7
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_gleif import base_url, start_mock_gleif, synthetic_lei  # noqa: E402
+
+
+async def fetch_all(lei, concurrency):
+    lei.GLEIF_MAX_CONCURRENCY = concurrency
+    await lei.close_client()
+    start = time.perf_counter()
+    records = await lei.get_lei_records(legal_name="example holdings")
+    elapsed = time.perf_counter() - start
+    await lei.close_client()
+    return records, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-every", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    server, state = start_mock_gleif(records=args.records, latency=args.latency, fail_every=args.fail_every)
+    os.environ["GLEIF_BASE_URL"] = base_url(server)
+    os.environ["GLEIF_BACKOFF"] = "0.01"
+    os.environ["GLEIF_MAX_PAGES"] = str(args.records)
+    import real_time_scraper_LEI as lei
+
+    expected = [synthetic_lei(i) for i in range(args.records)]
+    failed = False
+    for concurrency in (1, args.concurrency):
+        state.requests = 0
+        records, elapsed = asyncio.run(fetch_all(lei, concurrency))
+        complete = isinstance(records, list) and [r["LEI"] for r in records] == expected
+        failed = failed or not complete
+        print(f"concurrency {concurrency}: {len(records)} records in {elapsed:.2f} s, "
+              f"{state.requests} upstream requests, {'complete' if complete else 'INCOMPLETE'}")
+
+    server.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Apply random single-source deltas with EntityScorer and check each against a full recomputation.
+
+Times the incremental update against re-running process_json_input on the
+whole updated payload, which is what a source update cost before.
+
+    python benchmarks/bench_incremental_scoring.py --entities 200 --deltas 20 --records 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import composits  # noqa: E402
+from bench_batch_scoring import NAMES, STATES, synthetic_payload  # noqa: E402
+
+SOURCES = ["abrData", "tpbData", "quickbookData", "leiData", "xeroData", "caData"]
+
+
+def record(rng):
+    return {"company_name": rng.choice(NAMES), "Business Name": rng.choice(NAMES), "State": rng.choice(STATES),
+            "ABN": rng.choice(["58453256019", "11111111111"]), "pcode": rng.choice(["4380", "4000"])}
+
+
+def entity_payload(rng, records):
+    # The batch-scoring payload plus `records` more records in each list source
+    payload = synthetic_payload(rng)
+    for source in ("quickbookData", "leiData", "xeroData"):
+        payload["combinedResults"][source] += [record(rng) for _ in range(records)]
+    return payload
+
+
+def random_delta(rng, scorer):
+    present = list(scorer.payload()["combinedResults"])
+    roll = rng.random()
+    if roll < 0.2 and present:
+        return {"op": "remove", "source": rng.choice(present)}
+    if roll < 0.5:
+        return {"op": "add", "source": rng.choice(SOURCES), "data": [record(rng) for _ in range(rng.randint(1, 3))]}
+    data = record(rng) if rng.random() < 0.3 else [record(rng) for _ in range(rng.randint(0, 4))]
+    return {"op": "replace", "source": rng.choice(SOURCES), "data": data}
+
+
+def run(entities, deltas, records, seed=7):
+    rng = random.Random(seed)
+    incremental_seconds = full_seconds = 0.0
+    mismatches = 0
+    for _ in range(entities):
+        scorer = composits.EntityScorer(entity_payload(rng, records))
+        for _ in range(deltas):
+            delta = random_delta(rng, scorer)
+
+            start = time.perf_counter()
+            scorer.apply(delta)
+            actual = scorer.result()
+            incremental_seconds += time.perf_counter() - start
+
+            payload = scorer.payload()
+            start = time.perf_counter()
+            expected = composits.process_json_input(payload)
+            full_seconds += time.perf_counter() - start
+
+            mismatches += list(actual.items()) != list(expected.items())
+
+    updates = entities * deltas
+    print(f"{updates} source updates  incremental {incremental_seconds / updates * 1e6:.0f} us/update  "
+          f"full recompute {full_seconds / updates * 1e6:.0f} us/update")
+    if mismatches:
+        print(f"PARITY FAILED for {mismatches} updates")
+        return 1
+    print("parity OK")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=200)
+    parser.add_argument("--deltas", type=int, default=20)
+    parser.add_argument("--records", type=int, default=20, help="extra records per list source")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(run(args.entities, args.deltas, args.records, args.seed))
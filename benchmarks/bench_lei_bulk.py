@@ -0,0 +1,97 @@
+"""Throughput of POST /lei-records/bulk against the mock GLEIF server.
+
+Compares one upstream lookup per query, run sequentially, with the bulk
+endpoint. The bulk endpoint packs LEI and registration-ID queries into
+multi-value filters and fans out the rest. Every streamed line is checked
+against its input query.
+
+    python benchmarks/bench_lei_bulk.py --leis 400 --registered-as 200 --names 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_gleif import base_url, start_mock_gleif, synthetic_lei  # noqa: E402
+
+
+def build_queries(records, leis, registered_as, names, seed=7):
+    rng = random.Random(seed)
+    queries = []
+    for i in rng.sample(range(records), leis):
+        queries.append(({"lei": synthetic_lei(i)}, synthetic_lei(i)))
+    for i in rng.sample(range(records), registered_as):
+        queries.append(({"registered_as": str(600000000 + i)}, synthetic_lei(i)))
+    for i in rng.sample(range(records), names):
+        queries.append(({"legal_name": f"example holdings {i} pty"}, synthetic_lei(i)))
+    rng.shuffle(queries)
+    return queries
+
+
+async def sequential(lei, queries):
+    for query, _ in queries:
+        await lei.get_lei_records(**query)
+    await lei.close_client()
+
+
+async def bulk(lei, queries):
+    import httpx
+
+    transport = httpx.ASGITransport(app=lei.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        response = await client.post("/lei-records/bulk", json=[query for query, _ in queries])
+    await lei.close_client()
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--leis", type=int, default=400)
+    parser.add_argument("--registered-as", type=int, default=200)
+    parser.add_argument("--names", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, state = start_mock_gleif(records=args.records, latency=args.latency)
+    os.environ["GLEIF_BASE_URL"] = base_url(server)
+    import real_time_scraper_LEI as lei
+    from lookup_cache import LookupCache
+
+    queries = build_queries(args.records, args.leis, args.registered_as, args.names)
+
+    start = time.perf_counter()
+    asyncio.run(sequential(lei, queries))
+    sequential_seconds = time.perf_counter() - start
+    sequential_requests = state.requests
+
+    lei.lookup_cache = LookupCache()
+    state.requests = 0
+    start = time.perf_counter()
+    lines = asyncio.run(bulk(lei, queries))
+    bulk_seconds = time.perf_counter() - start
+
+    wrong = [line for line in lines
+             if [r["LEI"] for r in line.get("data", [])] != [queries[line["index"]][1]]]
+    print(f"{len(queries)} queries")
+    print(f"sequential {len(queries) / sequential_seconds:8.1f} queries/s  "
+          f"{sequential_seconds:6.2f} s  {sequential_requests} upstream requests")
+    print(f"bulk       {len(queries) / bulk_seconds:8.1f} queries/s  "
+          f"{bulk_seconds:6.2f} s  {state.requests} upstream requests")
+    if len(lines) != len(queries) or wrong:
+        print(f"MISMATCH: {len(lines)} lines, {len(wrong)} wrong")
+        return 1
+    print("every line matches its query")
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
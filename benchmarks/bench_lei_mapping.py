@@ -0,0 +1,46 @@
+"""Microbenchmark map_lei_record on large GLEIF pages.
+
+Times the single-pass mapper against the previous build-then-prune mapper,
+which lives with the parity tests in tests/test_lei_mapping.py.
+
+    python benchmarks/bench_lei_mapping.py --page-sizes 200 1000 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "tests"))
+
+from real_time_scraper_LEI import map_lei_record  # noqa: E402
+from test_lei_mapping import legacy_map_lei_record, varied_record  # noqa: E402
+
+
+def run(page_sizes, repeat, seed=7):
+    rng = random.Random(seed)
+    for page_size in page_sizes:
+        page = [varied_record(i, rng) for i in range(page_size)]
+        timings = {}
+        for label, mapper in (("build-then-prune", legacy_map_lei_record), ("single-pass", map_lei_record)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for record in page:
+                    mapper(record)
+                best = min(best, time.perf_counter() - start)
+            timings[label] = best
+        print(f"page size {page_size:>6}: build-then-prune {timings['build-then-prune'] * 1000:8.2f} ms  "
+              f"single-pass {timings['single-pass'] * 1000:8.2f} ms  "
+              f"x{timings['build-then-prune'] / timings['single-pass']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.page_sizes, args.repeat)
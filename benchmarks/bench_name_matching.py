@@ -0,0 +1,103 @@
+"""Benchmark name clustering on synthetic entities with many candidate values.
+
+Compares the prefix-filtered cluster_names with an all-pairs comparison at
+the same threshold, and checks that both produce the same clusters.
+
+The index only pays off on large entities. At a hundred values it is about
+twice as slow as all-pairs (3.4 vs 1.7 ms here) and at 300 it is no faster
+(13.6 vs 14.0 ms); it wins from about a thousand values (83 vs 141 ms at
+1000, 500 vs 1173 ms at 3000).
+
+    python benchmarks/bench_name_matching.py --values 100 300 1000 3000
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_matching import (NAME_SIMILARITY_THRESHOLD, cluster_names, dice,  # noqa: E402
+                           name_numbers, name_trigrams, normalise_name)
+
+WORDS = ["KBBK", "SOLUTIONS", "BICKERTON", "ACCOUNTS", "BOOKKEEPING", "HOLDINGS", "STANTHORPE",
+         "GRANITE", "BELT", "ADVISORY", "TAX", "SERVICES", "KELLIE", "PARTNERS", "GROUP", "TRUST"]
+SUFFIXES = ["", " PTY LTD", " PTY. LTD.", " LIMITED"]
+
+
+def variant(name, rng):
+    roll = rng.random()
+    if roll < 0.3:
+        return name.replace(" ", ". ", 1).lower()
+    if roll < 0.6 and len(name) > 4:
+        i = rng.randrange(len(name))
+        return name[:i] + rng.choice(string.ascii_uppercase) + name[i + 1:]
+    if roll < 0.8:
+        return name + rng.choice(SUFFIXES)
+    return name
+
+
+def synthetic_values(count, seed=7):
+    rng = random.Random(seed)
+    bases = [" ".join(rng.sample(WORDS, rng.randint(2, 4))) for _ in range(max(2, count // 8))]
+    # Numbered entities ("... HOLDINGS 2") that must stay apart from their siblings
+    bases += [f"{base} {number}" for base in bases[:len(bases) // 4] for number in (1, 2)]
+    return [variant(rng.choice(bases), rng) for _ in range(count)]
+
+
+def all_pairs_clusters(values, threshold):
+    forms = list(dict.fromkeys(normalise_name(value) for value in values))
+    grams = [name_trigrams(form) for form in forms]
+    numbers = [name_numbers(form) for form in forms]
+    parent = list(range(len(forms)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(forms)):
+        for j in range(i):
+            if numbers[i] == numbers[j] and dice(grams[i], grams[j]) >= threshold:
+                root_i, root_j = find(i), find(j)
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+    return {form: find(i) for i, form in enumerate(forms)}
+
+
+def partition(labels_by_key):
+    groups = {}
+    for key, label in labels_by_key.items():
+        groups.setdefault(label, set()).add(key)
+    return sorted(sorted(group) for group in groups.values())
+
+
+def run(sizes, threshold):
+    failed = False
+    for size in sizes:
+        values = synthetic_values(size)
+
+        start = time.perf_counter()
+        labels = cluster_names(values, threshold)
+        indexed_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = all_pairs_clusters(values, threshold)
+        all_pairs_seconds = time.perf_counter() - start
+
+        indexed = {normalise_name(value): normalise_name(label) for value, label in labels.items()}
+        same = partition(indexed) == partition(reference)
+        failed = failed or not same
+        print(f"{size:>6} values  {len(set(labels.values())):>5} clusters  "
+              f"indexed {indexed_seconds * 1000:9.1f} ms  all-pairs {all_pairs_seconds * 1000:9.1f} ms  "
+              f"{'same clusters' if same else 'CLUSTERS DIFFER'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, nargs="+", default=[100, 300, 1000, 3000])
+    parser.add_argument("--threshold", type=float, default=NAME_SIMILARITY_THRESHOLD)
+    args = parser.parse_args()
+    sys.exit(run(args.values, args.threshold))
@@ -0,0 +1,70 @@
+"""Compare the prebuilt postcode index against the old boolean-mask scan.
+
+    python benchmarks/bench_postcode_index.py --lookups 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from composits import build_postcode_index, lookup_localities  # noqa: E402
+
+
+def synthetic_postcode_df(rows=18000, postcodes=3200, seed=7):
+    rng = random.Random(seed)
+    codes = rng.sample(range(200, 9999), postcodes)
+    return pd.DataFrame({
+        "Pcode": [rng.choice(codes) for _ in range(rows)],
+        "Locality": [f"LOCALITY {i}" for i in range(rows)],
+    })
+
+
+def mask_scan(df, pcode):
+    locality_row = df[df['Pcode'] == pcode]
+    if not locality_row.empty:
+        return locality_row['Locality'].values[0]
+    return None
+
+
+def run(lookups, scan_limit, seed=7):
+    df = synthetic_postcode_df(seed=seed)
+    rng = random.Random(seed)
+    codes = df['Pcode'].unique().tolist()
+
+    start = time.perf_counter()
+    index = build_postcode_index(df)
+    build_seconds = time.perf_counter() - start
+    print(f"index build: {build_seconds * 1000:.1f} ms ({len(index)} postcodes, {len(df)} rows)")
+
+    for n in lookups:
+        queries = [rng.choice(codes) for _ in range(n)]
+
+        start = time.perf_counter()
+        for pcode in queries:
+            lookup_localities(pcode, index)
+        index_seconds = time.perf_counter() - start
+
+        measured = min(n, scan_limit)
+        start = time.perf_counter()
+        for pcode in queries[:measured]:
+            mask_scan(df, pcode)
+        scan_seconds = (time.perf_counter() - start) * n / measured
+        note = "" if measured == n else f" (extrapolated from {measured})"
+
+        print(f"{n:>9} lookups  index {index_seconds:8.3f} s  "
+              f"mask scan {scan_seconds:9.3f} s{note}  "
+              f"speedup x{scan_seconds / index_seconds:,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--scan-limit", type=int, default=100000,
+                        help="cap on mask-scan lookups actually timed; larger runs are extrapolated")
+    args = parser.parse_args()
+    run(args.lookups, args.scan_limit)
@@ -0,0 +1,111 @@
+"""Load test /search/ against the static TPB register stand-in.
+
+Needs Chrome and chromedriver. Compares a fresh browser per request
+(max_uses=1) with a warmed, reused driver pool, and with --scaling reports
+throughput for several pool sizes under the same client concurrency.
+
+    python benchmarks/load_tpb.py --requests 40 --concurrency 4 --pool-size 4
+    python benchmarks/load_tpb.py --requests 60 --scaling 1 2 4 8
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+
+def serve_stand_in(port):
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=BENCH_DIR)
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_app(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def timed_request(url):
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            json.load(response)
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def run_scenario(label, api_port, total, concurrency):
+    urls = [f"http://127.0.0.1:{api_port}/search/?name=kbbk+solutions+{i}" for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_request, urls))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status != 200)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"{label:<8} {total / elapsed:6.2f} req/s  p50 {statistics.median(latencies):6.2f} s  "
+          f"p95 {p95:6.2f} s  errors {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-uses", type=int, default=50)
+    parser.add_argument("--scaling", type=int, nargs="+", metavar="SIZE",
+                        help="pool sizes to compare; client concurrency is the largest size")
+    parser.add_argument("--render-delay", type=int, default=300, help="stand-in results delay in ms")
+    parser.add_argument("--static-port", type=int, default=8765)
+    parser.add_argument("--api-port", type=int, default=8766)
+    args = parser.parse_args()
+
+    serve_stand_in(args.static_port)
+    os.environ["TPB_REGISTER_URL"] = (
+        f"http://127.0.0.1:{args.static_port}/tpb_register.html?delay={args.render_delay}")
+    import tpb_scraper
+
+    server = serve_app(tpb_scraper.app, args.api_port)
+
+    if args.scaling:
+        concurrency = max(args.scaling)
+        for size in args.scaling:
+            pool = tpb_scraper.configure_scraper_pool(size, args.max_uses, max_queue=args.requests)
+            pool.warm_up()
+            run_scenario(f"pool={size}", args.api_port, args.requests, concurrency)
+    else:
+        # Replaces the pool warmed at startup so every request pays for a new browser
+        tpb_scraper.configure_scraper_pool(args.concurrency, 1)
+        run_scenario("fresh", args.api_port, args.requests, args.concurrency)
+
+        pool = tpb_scraper.configure_scraper_pool(args.pool_size, args.max_uses)
+        pool.warm_up()
+        run_scenario("pooled", args.api_port, args.requests, args.concurrency)
+
+    server.should_exit = True
+    tpb_scraper.scraper_runner.shutdown()
+    tpb_scraper.driver_pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Local stand-in for the GLEIF lei-records API.
+
+Serves deterministic synthetic records with JSON:API pagination and supports
+filter[entity.legalName] (case-insensitive substring), filter[entity.addresses.city],
+filter[entity.addresses.postalCode], and comma-separated filter[lei] /
+filter[entity.registeredAs]. Can add latency, inject 429 responses and
+answer every request with a fixed error status.
+
+    python benchmarks/mock_gleif.py --records 5000 --port 8790
+"""
+import argparse
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+CITIES = [("BRISBANE", "4000", "AU-QLD"), ("SYDNEY", "2000", "AU-NSW"), ("MELBOURNE", "3000", "AU-VIC"),
+          ("STANTHORPE", "4380", "AU-QLD"), ("PERTH", "6000", "AU-WA")]
+
+
+def synthetic_lei(i):
+    return f"5493{i:014d}AU"
+
+
+def synthetic_record(i):
+    city, postal_code, region = CITIES[i % len(CITIES)]
+    lei = synthetic_lei(i)
+    address = {
+        "language": "en",
+        "addressLines": [f"{i % 400 + 1} EXAMPLE STREET"],
+        "addressNumber": None,
+        "city": city,
+        "region": region,
+        "country": "AU",
+        "postalCode": postal_code,
+    }
+    return {
+        "type": "lei-records",
+        "id": lei,
+        "attributes": {
+            "lei": lei,
+            "entity": {
+                "legalName": {"name": f"EXAMPLE HOLDINGS {i} PTY LTD", "language": "en"},
+                "otherEntityNames": {"OtherEntityName": [f"EXAMPLE {i}"]} if i % 3 == 0 else [],
+                "legalAddress": address,
+                "headquartersAddress": dict(address),
+                "registrationAuthority": {
+                    "RegistrationAuthorityID": "RA000014",
+                    "RegistrationAuthorityEntityID": f"{600000000 + i}",
+                },
+                "registeredAs": f"{600000000 + i}",
+                "legalJurisdiction": "AU",
+                "entityCategory": "GENERAL",
+                "legalForm": {"EntityLegalFormCode": "TXVC"},
+                "entityStatus": "ACTIVE",
+                "entityCreationDate": "2015-06-01T00:00:00Z",
+            },
+            "registration": {
+                "initialRegistrationDate": "2016-01-12T00:00:00Z",
+                "lastUpdateDate": "2024-01-10T00:00:00Z",
+                "registrationStatus": "ISSUED",
+                "nextRenewalDate": "2025-01-12T00:00:00Z",
+                "managingLou": "5493001KJTIIGC8Y1R12",
+                "validationSources": "FULLY_CORROBORATED",
+                "validationAuthority": {"ValidationAuthorityID": "RA000014"},
+            },
+        },
+    }
+
+
+def matches(record, filters):
+    entity = record["attributes"]["entity"]
+    for name, value in filters.items():
+        if name == "filter[entity.legalName]":
+            if value.lower() not in entity["legalName"]["name"].lower():
+                return False
+        elif name == "filter[entity.addresses.city]":
+            if value.lower() != entity["legalAddress"]["city"].lower():
+                return False
+        elif name == "filter[entity.addresses.postalCode]":
+            if value != entity["legalAddress"]["postalCode"]:
+                return False
+        elif name == "filter[lei]":
+            if record["attributes"]["lei"] not in value.split(","):
+                return False
+        elif name == "filter[entity.registeredAs]":
+            if entity["registeredAs"] not in value.split(","):
+                return False
+    return True
+
+
+class MockGleifState:
+    def __init__(self, records, latency=0.0, fail_every=0, retry_after="0", error_status=0):
+        self.records = [synthetic_record(i) for i in range(records)]
+        self.latency = latency
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.error_status = error_status
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/vnd.api+json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+                request_number = state.requests
+            if state.latency:
+                time.sleep(state.latency)
+            if state.error_status:
+                self._send(state.error_status, {"errors": [{"status": str(state.error_status)}]})
+                return
+            if state.fail_every and request_number % state.fail_every == 0:
+                self._send(429, {"errors": [{"status": "429"}]}, {"Retry-After": state.retry_after})
+                return
+
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+            filters = {k: v for k, v in query.items() if k.startswith("filter[")}
+            page_number = int(query.get("page[number]", 1))
+            page_size = min(int(query.get("page[size]", 10)), 200)
+
+            found = [record for record in state.records if matches(record, filters)]
+            start = (page_number - 1) * page_size
+            last_page = max(1, -(-len(found) // page_size))
+            self._send(200, {
+                "meta": {"pagination": {"currentPage": page_number, "perPage": page_size,
+                                        "from": start + 1, "to": min(start + page_size, len(found)),
+                                        "total": len(found), "lastPage": last_page}},
+                "data": found[start:start + page_size],
+            })
+
+    return Handler
+
+
+def start_mock_gleif(port=0, records=1000, latency=0.0, fail_every=0, retry_after="0", error_status=0):
+    # Returns (server, state); the API lives at http://127.0.0.1:<port>/api/v1/lei-records
+    state = MockGleifState(records, latency, fail_every, retry_after, error_status)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/api/v1/lei-records"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with 429")
+    args = parser.parse_args()
+    server, _ = start_mock_gleif(args.port, args.records, args.latency, args.fail_every)
+    print(f"mock GLEIF at {base_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,192 @@
+"""Benchmark suite for the extraction, scoring and LEI mapping paths.
+
+Generates seeded combinedResults payloads and a synthetic postcode CSV, then
+times extract_keys_from_sources, set_dynamic_probability, process_json_input
+(end to end, from a JSON string) and map_lei_record over the GLEIF page in
+fixtures/, a page per call. Each result has throughput, p50/p99 latency,
+tracemalloc peak and a digest of the outputs, written as JSON so runs can
+be compared:
+
+    python benchmarks/run_suite.py -o before.json
+    python benchmarks/run_suite.py -o after.json --compare before.json
+
+--record-fixture URL replaces the fixture page with one fetched from a
+lei-records endpoint, e.g. "https://api.gleif.org/api/v1/lei-records?filter[entity.legalAddress.country]=AU&page[size]=50".
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import PayloadGenerator, write_postcode_csv  # noqa: E402
+
+LEI_FIXTURE = os.path.join(BENCH_DIR, "fixtures", "gleif_lei_records_page.json")
+# Calls traced for peak memory; tracemalloc slows everything down, so it gets a separate pass
+MEMORY_SAMPLE = 200
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def digest(outputs):
+    return hashlib.sha256(json.dumps(outputs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def measure(fn, inputs, repeat=1):
+    for item in inputs[:50]:
+        fn(item)
+    latencies, outputs = [], []
+    for _ in range(repeat):
+        outputs = []
+        for item in inputs:
+            start = time.perf_counter()
+            outputs.append(fn(item))
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    tracemalloc.start()
+    for item in inputs[:MEMORY_SAMPLE]:
+        tracemalloc.reset_peak()
+        fn(item)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "calls": len(latencies),
+        "throughput_per_s": round(len(latencies) / total, 1) if total else None,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "peak_kib": round(peak / 1024, 1),
+        "output_digest": digest(outputs),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def record_fixture(url):
+    import httpx
+
+    response = httpx.get(url, headers={"Accept": "application/vnd.api+json"}, timeout=60)
+    response.raise_for_status()
+    with open(LEI_FIXTURE, "w", encoding="utf-8") as f:
+        json.dump(response.json(), f, ensure_ascii=False, separators=(",", ":"))
+    print(f"recorded {len(response.json().get('data', []))} records to {LEI_FIXTURE}")
+
+
+def run(args):
+    import composits
+    from real_time_scraper_LEI import map_lei_record
+
+    with tempfile.TemporaryDirectory(prefix="composits-bench-") as workdir:
+        postcode_csv = os.path.join(workdir, "postcodes.csv")
+        postcodes = write_postcode_csv(postcode_csv, postcodes=args.postcodes, seed=args.seed)
+        composits.configure_postcode_store(csv_path=postcode_csv, cache_path="")
+        start = time.perf_counter()
+        composits.get_postcode_index()
+        index_seconds = time.perf_counter() - start
+
+    generator = PayloadGenerator(seed=args.seed, sources=args.sources, list_length=tuple(args.list_length),
+                                 name_variants=args.name_variants, postcode_spread=args.postcode_spread,
+                                 postcodes=postcodes)
+    payloads = generator.payloads(args.payloads)
+    payload_strings = [json.dumps(payload) for payload in payloads]
+    extracted = [composits.extract_keys_from_sources(payload) for payload in payloads]
+    with open(LEI_FIXTURE, encoding="utf-8") as f:
+        lei_records = json.load(f)["data"]
+
+    results = {"postcode_index_build": {"seconds": round(index_seconds, 4),
+                                        "postcodes": len(composits.get_postcode_index())}}
+    # Extraction diagnostics are printed; keep them out of the report
+    with contextlib.redirect_stdout(sys.stderr):
+        results["extract_keys_from_sources"] = measure(composits.extract_keys_from_sources, payloads, args.repeat)
+        results["set_dynamic_probability"] = measure(composits.set_dynamic_probability, extracted, args.repeat)
+        results["process_json_input"] = measure(composits.process_json_input, payload_strings, args.repeat)
+        # Per fixture page, as get_lei_records maps them
+        results["map_lei_page"] = measure(lambda page: [map_lei_record(record) for record in page],
+                                          [lei_records] * max(1, args.payloads // 10), args.repeat)
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "record_fixture")},
+        "results": results,
+    }
+
+
+def compare(report, baseline, max_regression):
+    # Prints per-benchmark changes; returns 1 when throughput drops more than max_regression
+    regressed = False
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "throughput_per_s" not in result or not before.get("throughput_per_s"):
+            continue
+        change = result["throughput_per_s"] / before["throughput_per_s"] - 1
+        flags = []
+        if change < -max_regression:
+            flags.append("REGRESSION")
+            regressed = True
+        if result["output_digest"] != before.get("output_digest"):
+            flags.append("output changed")
+        print(f"{name:28} {before['throughput_per_s']:>10.1f} -> {result['throughput_per_s']:>10.1f}/s "
+              f"({change:+.1%})  p99 {before['p99_ms']:.3f} -> {result['p99_ms']:.3f} ms  "
+              f"peak {before['peak_kib']:.0f} -> {result['peak_kib']:.0f} KiB  {' '.join(flags)}",
+              file=sys.stderr)
+    return 1 if regressed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payloads", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the inputs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--sources", type=int, default=4, help="list sources per payload besides abrData/tpbData")
+    parser.add_argument("--list-length", type=int, nargs=2, default=[0, 4], metavar=("MIN", "MAX"))
+    parser.add_argument("--name-variants", type=int, default=3)
+    parser.add_argument("--postcode-spread", type=int, default=2, help="distinct postcodes per entity")
+    parser.add_argument("--postcodes", type=int, default=3000, help="postcodes in the synthetic CSV")
+    parser.add_argument("-o", "--output", default="-", help="JSON report file, or - for stdout")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="throughput drop that fails --compare")
+    parser.add_argument("--record-fixture", metavar="URL", help="refresh the GLEIF fixture page and exit")
+    args = parser.parse_args()
+
+    if args.record_fixture:
+        record_fixture(args.record_fixture)
+        return 0
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            return compare(report, json.load(f), args.max_regression)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
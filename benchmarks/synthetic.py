@@ -0,0 +1,108 @@
+"""Seeded generators for combinedResults payloads and the postcode CSV.
+
+Payloads mimic the shapes the scrapers return: dict sources (abrData,
+tpbData) and list sources (quickbookData, leiData, ...) whose length, name
+spellings and postcodes vary with the generator settings.
+"""
+import csv
+import random
+
+BASE_NAMES = ["KBBK SOLUTIONS", "BY ALL ACCOUNTS BOOKKEEPING", "GRANITE BELT ADVISORY", "STANTHORPE TAX SERVICES",
+              "BICKERTON HOLDINGS", "SEVERN RIVER PARTNERS", "AMIENS ACCOUNTING GROUP", "RUBY CREEK TRUST"]
+PEOPLE = ["BICKERTON, KELLIE", "SMITH, JOHN", "NGUYEN, ANNA", "WILLIAMS, GRACE", "PATEL, RAVI"]
+STATES = ["QLD", "Queensland", "NSW", "New South Wales", "VIC", "victoria", "WA"]
+LIST_SOURCES = ["quickbookData", "leiData", "xeroData", "acnData", "caData", "paData", "asxData"]
+SUFFIXES = ["", " PTY LTD", " PTY. LTD.", " Pty Ltd", " LIMITED"]
+
+
+def name_variant(rng, name):
+    # Case, punctuation, suffix and single-letter spelling differences
+    roll = rng.random()
+    if roll < 0.2:
+        name = name.replace(" ", ". ", 1)
+    elif roll < 0.35 and len(name) > 5:
+        i = rng.randrange(len(name))
+        name = name[:i] + rng.choice("AEIOUY") + name[i + 1:]
+    name += rng.choice(SUFFIXES)
+    return name.lower() if rng.random() < 0.2 else name.title() if rng.random() < 0.3 else name
+
+
+def write_postcode_csv(path, postcodes=3000, rows=18000, seed=7):
+    # Same columns as the geocoded postcode file; returns the postcodes written
+    rng = random.Random(seed)
+    codes = sorted(rng.sample(range(200, 9999), postcodes))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Pcode", "Locality", "State", "Latitude", "Longitude"])
+        for i in range(rows):
+            code = codes[i % postcodes] if i < postcodes else rng.choice(codes)
+            writer.writerow([f"{code:04d}", f"LOCALITY {i}", rng.choice(["QLD", "NSW", "VIC", "WA"]),
+                             round(rng.uniform(-43, -10), 5), round(rng.uniform(113, 153), 5)])
+    return [f"{code:04d}" for code in codes]
+
+
+class PayloadGenerator:
+    """Seeded combinedResults payloads.
+
+    sources: list sources present besides abrData and tpbData
+    list_length: (min, max) records per list source
+    name_variants: distinct spellings drawn per entity
+    postcode_spread: distinct postcodes drawn per entity
+    """
+
+    def __init__(self, seed=7, sources=4, list_length=(0, 4), name_variants=3, postcode_spread=2, postcodes=None):
+        self.rng = random.Random(seed)
+        self.sources = LIST_SOURCES[:sources]
+        self.list_length = list_length
+        self.name_variants = name_variants
+        self.postcode_spread = postcode_spread
+        self.postcodes = postcodes or [f"{code:04d}" for code in range(4000, 4400)]
+        self.entity = 0
+
+    def payload(self):
+        rng = self.rng
+        self.entity += 1
+        base = rng.choice(BASE_NAMES)
+        names = [name_variant(rng, base) for _ in range(self.name_variants)]
+        postcodes = [rng.choice(self.postcodes) for _ in range(self.postcode_spread)]
+        abn = str(10000000000 + rng.randrange(89999999999))
+        person = rng.choice(PEOPLE)
+
+        combined = {
+            "abrData": {
+                "ABN": abn,
+                "Entity Status Code": rng.choice(["Active", "Cancelled"]),
+                "Entity Type": "IND",
+                "Goods And Services Tax": "2016-04-01",
+                "State": rng.choice(STATES),
+                "Post Code": postcodes[0],
+                "Entity Name": person,
+                "Business Name": ";".join(rng.sample(names, min(2, len(names)))),
+                "Trading Name": rng.choice(names),
+                "recordLastConfirmedDate": "2024-09-25T07:06:36.396Z",
+                "Suburb": "STANTHORPE",
+            },
+            "tpbData": {
+                "legal_name": person.split(", ")[-1].title() + " " + person.split(", ")[0].title(),
+                "business_name": rng.choice(names),
+                "registration_number": str(rng.randrange(10**7, 10**8)),
+                "Suburb": "STANTHORPE",
+                "state": rng.choice(STATES),
+            },
+        }
+        for source in self.sources:
+            records = []
+            for _ in range(rng.randint(*self.list_length)):
+                records.append({
+                    "company_name": rng.choice(names),
+                    "pcode": rng.choice(postcodes),
+                    "State": rng.choice(STATES),
+                    "ABN": abn if rng.random() < 0.8 else str(10000000000 + rng.randrange(89999999999)),
+                    "LegalName": rng.choice(names),
+                    "notes": "x" * rng.randrange(0, 200),
+                })
+            combined[source] = records
+        return {"combinedResults": combined}
+
+    def payloads(self, count):
+        return [self.payload() for _ in range(count)]
@@ -1,10 +1,118 @@
+import numpy as np
 import pandas as pd
+import argparse
+import contextlib
+import gc
 import json
-from collections import Counter
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter, itemgetter
+
+from fast_json import dumps as json_dumps, loads as json_loads
+from instrumentation import inc, record_error, stage_timer, timed
+from name_matching import cluster_names
+
+# Pcode CSV path, overridable per deployment
+csv_file_path = os.environ.get('POSTCODE_CSV_PATH', '/home/waqar/Downloads/geocoded_postcode_file.csv')
+# Score similar names (punctuation, small spelling differences) as one value
+FUZZY_NAME_MATCHING = os.environ.get("FUZZY_NAME_MATCHING", "1") != "0"
+# Optional pickled snapshot of the postcode index so later startups skip CSV parsing
+postcode_cache_path = os.environ.get('POSTCODE_CACHE_PATH', '')
+
+_postcode_index = None
+_postcode_index_lock = threading.Lock()
+
+
+def load_postcode_table(path):
+    # Only the two columns the lookup needs, with compact dtypes
+    df = pd.read_csv(path, usecols=['Pcode', 'Locality'], dtype={'Pcode': 'string', 'Locality': 'category'})
+    df['Pcode'] = pd.to_numeric(df['Pcode'], errors='coerce')
+    df = df.dropna(subset=['Pcode'])
+    df['Pcode'] = df['Pcode'].astype('int32')
+    return df
+
+
+def build_postcode_index(df):
+    # Pcode -> every locality sharing that postcode, in file order, built once
+    index = {}
+    df = df.dropna(subset=['Pcode'])
+    for pcode, locality in zip(df['Pcode'].tolist(), df['Locality'].tolist()):
+        localities = index.setdefault(int(pcode), [])
+        if locality not in localities:
+            localities.append(locality)
+    return index
+
+
+def lookup_localities(pcode, index):
+    return index.get(int(pcode), [])
+
+
+def _postcode_csv_signature(path):
+    # A snapshot is only reused for the same file, unchanged: another CSV copied
+    # in with its timestamp preserved still differs in path or size
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _read_postcode_snapshot(cache_path, csv_signature):
+    try:
+        with open(cache_path, 'rb') as f:
+            snapshot = pickle.load(f)
+        if snapshot.get('csv') == csv_signature:
+            return snapshot['index']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading postcode snapshot: {e}")
+        record_error("read_postcode_snapshot", e)
+    return None
+
 
-# Pcode CSV path 
-csv_file_path = '/home/waqar/Downloads/geocoded_postcode_file.csv'
-postcode_df = pd.read_csv(csv_file_path)
+def _write_postcode_snapshot(cache_path, csv_signature, index):
+    try:
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'csv': csv_signature, 'index': index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Error writing postcode snapshot: {e}")
+        record_error("write_postcode_snapshot", e)
+
+
+def get_postcode_index():
+    # Built on first use rather than at import time
+    global _postcode_index
+    if _postcode_index is None:
+        with _postcode_index_lock:
+            if _postcode_index is None:
+                csv_signature = _postcode_csv_signature(csv_file_path)
+                index = None
+                if postcode_cache_path:
+                    index = _read_postcode_snapshot(postcode_cache_path, csv_signature)
+                if index is None:
+                    index = build_postcode_index(load_postcode_table(csv_file_path))
+                    if postcode_cache_path:
+                        _write_postcode_snapshot(postcode_cache_path, csv_signature, index)
+                _postcode_index = index
+    return _postcode_index
+
+
+def configure_postcode_store(csv_path=None, cache_path=None):
+    # Point the store at another CSV/snapshot; the index is rebuilt on next use
+    global csv_file_path, postcode_cache_path, _postcode_index
+    with _postcode_index_lock:
+        if csv_path is not None:
+            csv_file_path = csv_path
+        if cache_path is not None:
+            postcode_cache_path = cache_path
+        _postcode_index = None
 
 state_full_to_abbreviation = {
     "australian capital territory": "ACT",
@@ -22,6 +130,7 @@ def convert_state_to_abbreviation(state_value):
         return state_full_to_abbreviation.get(state_value.lower(), state_value)
     except Exception as e:
         print(f"Error in convert_state_to_abbreviation: {e}")
+        record_error("convert_state_to_abbreviation", e)
         return state_value
 
 def fix_name_format(legal_name):
@@ -36,93 +145,235 @@ def fix_name_format(legal_name):
         return legal_name.upper()
     except Exception as e:
         print(f"Error in fix_name_format: {e}")
+        record_error("fix_name_format", e)
         return legal_name.upper()
 
+# Score codes, highest first; only turned into "High"/"Medium"/"Low" when serialised
+HIGH, MEDIUM, LOW, UNSCORED = 3, 2, 1, 0
+SCORE_LABELS = {HIGH: "High", MEDIUM: "Medium", LOW: "Low"}
+
+# Shared, immutable action sets
+EDITABLE_ACTIONS = ("ADD", "DELETE", "EDIT")
+DELETE_ACTIONS = ("DELETE",)
+
+
+def key_actions(key):
+    return EDITABLE_ACTIONS if key in ("State", "Postal code") else DELETE_ACTIONS
+
+
+class Candidate:
+    """One extracted value with its source and score code.
+
+    Values and sources are interned, so the many repeats across entities
+    share one string each.
+    """
+
+    __slots__ = ("value", "source", "score")
+
+    def __init__(self, value, source, score=UNSCORED):
+        self.value = value
+        self.source = source
+        self.score = score
+
+    def __repr__(self):
+        return f"Candidate({self.value!r}, {self.source!r}, {self.score})"
+
+
+@lru_cache(maxsize=65536)
+def _intern_upper(value):
+    return sys.intern(value.upper())
+
+
 # Main function to extract keys from the JSON sources
 def add_to_output(final_key, value, source_name, final_output):
     try:
-        value = str(value).upper()
-        if final_key not in final_output:
-            final_output[final_key] = []
-        final_output[final_key].append({
-            "value": value,
-            "source": source_name
-        })
+        value = _intern_upper(value if type(value) is str else str(value))
+        candidates = final_output.get(final_key)
+        if candidates is None:
+            candidates = final_output[final_key] = []
+        candidates.append(Candidate(value, sys.intern(source_name)))
 
     except Exception as e:
         print(f"Error in add_to_output: {e}")
+        record_error("add_to_output", e)
+
+
+def candidates_to_json(extracted):
+    # {key: [Candidate]} -> the {"value", "source"} shape of extract_keys_from_sources
+    return {key: [{"value": c.value, "source": c.source} for c in candidates]
+            for key, candidates in extracted.items()}
+
+
+def scored_to_json(result):
+    # {key: [scored Candidate]} -> the shape returned by process_json_input
+    output = {}
+    for key, candidates in result.items():
+        action = list(key_actions(key))
+        output[key] = [{"value": c.value, "source": c.source, "score": SCORE_LABELS[c.score], "action": action}
+                       for c in candidates]
+    return output
+
+
+# Final output key -> source keys that may hold it, in priority order
+KEYS_TO_EXTRACT = {
+    "Suburb": ["Suburb","suburb"],
+    "Entity Name": ["Entity Name","EntityName"],
+    "Trading name": ["Trading Name","TradingName"],
+    "Name": ["Name"],
+    "Company Name": ["company_name","Company_Name","Company Name","CompanyName"],
+    "Business Name": ["business_name", "Business name","BusinessName","Business Name"],
+    "ABR Entity Type": ["Entity Type"],
+    "ABN": ["ABN"],
+    "LegalName":["LegalName", "legal_name"],
+    "ACN": ["ASIC Number", "RegistrationAuthorityEntityID"],
+    "Postal code": ["Post Code", "Post code", "PostalCode", "Post_code", "Post_Code", "pcode", "Postal_Code", "Postal_code"],
+    "State": ["State", "Region"],
+    "Active Status": ["Entity Status Code", "EntityStatus"],
+    "ABR Last Updated Date": ["recordLastConfirmedDate"],
+    "GST Effective Date": ["Goods And Services Tax"],
+    "ABR Last Confirmed Date": ["recordLastConfirmedDate"],
+    "Locality": ["Locality"]
+}
 
-def process_source(source_name, source_data, keys_to_extract, final_output):
-    try:
-        postcode_keys = ["Post Code", "Post code", "PostalCode", "Post_code", "Post_Code", "pcode", "Postal_Code", "Postal_code"]
-        
+# Source keys matched against the postcode table, first present one wins
+POSTCODE_KEYS = ["Post Code", "Post code", "PostalCode", "Post_code", "Post_Code", "pcode", "Postal_Code", "Postal_code"]
+
+# Final keys a source never contributes
+SOURCE_SKIP_RULES = {
+    "tpbData": {"Suburb", "ABN"},
+}
+
+# Sources whose postcodes are not matched with the CSV file
+LOCALITY_SKIP_SOURCES = {"tpbData"}
+
+# Final keys a source packs several values into, with the separator to split on
+SOURCE_VALUE_SPLITS = {
+    "abrData": {"Business Name": ";"},
+}
+
+FIELD_TRANSFORMS = {
+    "State": convert_state_to_abbreviation,
+    "Legal Name": fix_name_format,
+}
+
+
+class ExtractionPlan:
+    """Inverted alias index (source key -> final keys) compiled once per source.
+
+    source_mappings optionally replaces keys_to_extract for individual sources.
+    """
+
+    def __init__(self, keys_to_extract=None, source_mappings=None, skip_rules=None,
+                 locality_skip_sources=None, postcode_keys=None, value_splits=None):
+        self.keys_to_extract = keys_to_extract if keys_to_extract is not None else KEYS_TO_EXTRACT
+        self.source_mappings = source_mappings or {}
+        self.skip_rules = skip_rules if skip_rules is not None else SOURCE_SKIP_RULES
+        self.locality_skip_sources = locality_skip_sources if locality_skip_sources is not None else LOCALITY_SKIP_SOURCES
+        self.postcode_keys = postcode_keys if postcode_keys is not None else POSTCODE_KEYS
+        self.value_splits = value_splits if value_splits is not None else SOURCE_VALUE_SPLITS
+        self._compiled = {}
+
+    def for_source(self, source_name):
+        compiled = self._compiled.get(source_name)
+        if compiled is None:
+            compiled = self._compiled[source_name] = self._compile(source_name)
+        return compiled
+
+    def _compile(self, source_name):
+        keys_to_extract = self.source_mappings.get(source_name, self.keys_to_extract)
+        skipped = self.skip_rules.get(source_name, ())
+        splits = self.value_splits.get(source_name, {})
+
+        # rank reproduces the final key / alias order of keys_to_extract
+        aliases = {}
+        rank = 0
         for final_key, possible_keys in keys_to_extract.items():
+            transform = FIELD_TRANSFORMS.get(final_key)
+            separator = splits.get(final_key)
             for key in possible_keys:
-                if key in source_data:
-                    value = source_data[key]
-                    # Skip SUbrub if the source is tpbData
-                    if final_key =="Suburb" and source_name == "tpbData":
-                        continue
-                    # Skip  ABN 
-                    if final_key == "ABN" and source_name == "tpbData":
-                        continue
-
-                    if final_key == "State":
-                        value = convert_state_to_abbreviation(value)
-                    if final_key == "Legal Name":
-                        value = fix_name_format(value)
-                    
-                    add_to_output(final_key, value, source_name, final_output)
-
-
-        # if NOT tpbData and other postcode, match it with the CSV filestcode
-        if source_name != "tpbData":
-            for key in postcode_keys:
-
-                if key in source_data:
-                    pcode = source_data.get(key)
-                    
-                    if pcode:
-                        pcode = int(pcode)                       
-                        locality_row = postcode_df[postcode_df['Pcode'] == pcode]
-                        if not locality_row.empty:
-                            locality = locality_row['Locality'].values[0]
-                            
-                            add_to_output("Locality", locality, source_name, final_output)
-                    break
+                if final_key not in skipped:
+                    aliases.setdefault(key, []).append((rank, final_key, transform, separator))
+                rank += 1
+
+        postcode_keys = {}
+        if source_name not in self.locality_skip_sources:
+            for position, key in enumerate(self.postcode_keys):
+                postcode_keys.setdefault(key, position)
+
+        return aliases, postcode_keys
+
+
+DEFAULT_EXTRACTION_PLAN = ExtractionPlan()
+
+
+def process_source(source_name, source_data, plan, final_output):
+    try:
+        aliases, postcode_keys = plan.for_source(source_name)
+
+        matches = []
+        skipped = 0
+        postcode_key, postcode_position = None, None
+        for key, value in source_data.items():
+            targets = aliases.get(key)
+            if targets:
+                for rank, final_key, transform, separator in targets:
+                    matches.append((rank, final_key, transform, separator, value))
+            else:
+                skipped += 1
+            position = postcode_keys.get(key)
+            if position is not None and (postcode_position is None or position < postcode_position):
+                postcode_key, postcode_position = key, position
+
+        matches.sort(key=itemgetter(0))
+        for _, final_key, transform, separator, value in matches:
+            if transform is not None:
+                value = transform(value)
+            if separator is not None:
+                for part in str(value).split(separator):
+                    if part.strip():
+                        add_to_output(final_key, part.strip(), source_name, final_output)
+            else:
+                add_to_output(final_key, value, source_name, final_output)
+        if skipped:
+            inc("fields_skipped_total", skipped, source=source_name)
+
+        # match the source postcode with the CSV file
+        if postcode_key is not None:
+            pcode = source_data.get(postcode_key)
+            if pcode:
+                with stage_timer("locality_lookup"):
+                    localities = lookup_localities(pcode, get_postcode_index())
+                if localities:
+                    # One candidate per source, so sources that agree still score High: the
+                    # locality the source names as its suburb, else the postcode's first
+                    suburbs = {str(value).strip().upper() for _, final_key, _, _, value in matches
+                               if final_key == "Suburb"}
+                    locality = next((locality for locality in localities if str(locality).upper() in suburbs),
+                                    localities[0])
+                    add_to_output("Locality", locality, source_name, final_output)
 
     except Exception as e:
         print(f"Error in process_source: {e}")
+        record_error("process_source", e)
+
+def extract_keys_from_sources(json_data, plan=None):
+    return candidates_to_json(extract_candidates(json_data, plan))
+
 
-def extract_keys_from_sources(json_data):
+@timed("extract")
+def extract_candidates(json_data, plan=None):
+    # Same as extract_keys_from_sources, keeping the compact Candidate records
     try:
-        if isinstance(json_data, str):
+        if isinstance(json_data, (str, bytes, bytearray, memoryview)):
             try:
-                json_data = json.loads(json_data)
+                json_data = json_loads(json_data)
             except json.JSONDecodeError as e:
                 print(f"JSON Decode Error: {e}")
+                record_error("extract_candidates", e)
                 return {}
 
-        keys_to_extract = {
-            "Suburb": ["Suburb","suburb"],
-            "Entity Name": ["Entity Name","EntityName"],
-            "Trading name": ["Trading Name","TradingName"],
-            "Name": ["Name"],
-            "Company Name": ["company_name","Company_Name","Company Name","CompanyName"],
-            "Business Name": ["business_name", "Business name","BusinessName","Business Name"],
-            "ABR Entity Type": ["Entity Type"],
-            "ABN": ["ABN"],
-            "Suburb":["Suburb","suburb"],
-            "LegalName":["LegalName", "legal_name"],
-            "ACN": ["ASIC Number", "RegistrationAuthorityEntityID"],
-            "Postal code": ["Post Code", "Post code", "PostalCode", "Post_code", "Post_Code", "pcode", "Postal_Code", "Postal_code"],
-            "State": ["State", "Region"],
-            "Active Status": ["Entity Status Code", "EntityStatus"],
-            "ABR Last Updated Date": ["recordLastConfirmedDate"],
-            "GST Effective Date": ["Goods And Services Tax"],
-            "ABR Last Confirmed Date": ["recordLastConfirmedDate"],
-            "Locality": ["Locality"]
-        }
+        if plan is None:
+            plan = DEFAULT_EXTRACTION_PLAN
 
         final_output = {}
 
@@ -130,96 +381,365 @@ def extract_keys_from_sources(json_data):
             try:
                 for source, source_data in json_data["combinedResults"].items():
                     if isinstance(source_data, dict):
-                        process_source(source, source_data, keys_to_extract, final_output)
+                        process_source(source, source_data, plan, final_output)
                     elif isinstance(source_data, list):
                         for item in source_data:
-                            process_source(source, item, keys_to_extract, final_output)
+                            process_source(source, item, plan, final_output)
             except Exception as e:
                 print(f"Error processing combinedResults: {e}")
+                record_error("extract_candidates", e)
 
         return final_output
 
     except Exception as e:
-        print(f"Error in extract_keys_from_sources: {e}")
+        print(f"Error in extract_candidates: {e}")
+        record_error("extract_candidates", e)
         return {}
 
-def set_dynamic_probability(data):
-    result = {}
-    score_order = {"High": 3, "Medium": 2, "Low": 1}
-    try:
-        for key, items in data.items():
-            value_counts = Counter([item["value"] for item in items])
-            total_items = len(items)
- 
-            action = ["ADD", "DELETE", "EDIT"] if key in ["State", "Postal code"] else ["DELETE"]
-            if len(value_counts) == 1:
-                count = value_counts[items[0]["value"]]
-                for item in items:
-                    score = "High" if count > 1 else "Medium"
-                    result.setdefault(key, []).append({
-                        "value": item["value"],
-                        "source": item["source"],
-                        "score": score,
-                        "action": action
-                    })
-
-            elif len(value_counts) == total_items:
-                for item in items:
-                    result.setdefault(key, []).append({
-                        "value": item["value"],
-                        "source": item["source"],
-                        "score": "Low",
-                        "action": action
-                    })
+def is_name_key(key):
+    return "name" in key.lower()
 
+
+def match_labels(key, values):
+    # The value each candidate is counted as: its name cluster for name-like keys,
+    # otherwise the value itself
+    if FUZZY_NAME_MATCHING and is_name_key(key) and len(values) > 1:
+        clusters = cluster_names(values)
+        return [clusters[value] for value in values]
+    return values
+
+
+def rank_candidates(key, candidates, labels=None, value_counts=None):
+    # Sets each candidate's score code and returns them highest first, ties in
+    # input order; labels/value_counts may be passed in when the caller keeps them
+    if labels is None:
+        labels = match_labels(key, [c.value for c in candidates])
+    if value_counts is None:
+        value_counts = Counter(labels)
+
+    if len(value_counts) == 1:
+        score = HIGH if value_counts[labels[0]] > 1 else MEDIUM
+        for c in candidates:
+            c.score = score
+
+    elif len(value_counts) == len(candidates):
+        for c in candidates:
+            c.score = LOW
+
+    else:
+        frequencies = sorted(value_counts.values(), reverse=True)
+        max_count = frequencies[0]
+        unique_max = frequencies.count(max_count) == 1
+
+        for c, label in zip(candidates, labels):
+            count = value_counts[label]
+
+            if count == max_count and unique_max:
+                c.score = HIGH
+            elif count > 1:
+                c.score = MEDIUM
             else:
-                frequencies = sorted(value_counts.values(), reverse=True)
-                max_count = frequencies[0]
-
-                for item in items:
-                    value = item["value"]
-                    count = value_counts[value]
-
-                    if count == max_count and frequencies.count(max_count) == 1:
-                        score = "High"
-                    elif count > 1:
-                        score = "Medium"
-                    else:
-                        score = "Low"
-
-                    result.setdefault(key, []).append({
-                        "value": value,
-                        "source": item["source"],
-                        "score": score,
-                        "action": action
-                    })
-
-            result[key] = sorted(
-                result[key], key=lambda x: score_order[x["score"]], reverse=True
-            )
-
-        ordered_result = {}
-        priority_keys = ["LegalName", "Entity Name", "Business Name"]
-      
-        for key in priority_keys:
-            if key in result:
-                ordered_result[key] = result.pop(key)
-        
-        for key in sorted(result.keys()):
-            if "Name" in key and key not in priority_keys:
-                ordered_result[key] = result.pop(key)
-
-        ordered_result.update(result)
+                c.score = LOW
+
+    return sorted(candidates, key=attrgetter("score"), reverse=True)
 
+
+@timed("score")
+def score_extracted(extracted):
+    # set_dynamic_probability over extract_candidates output, staying compact
+    try:
+        return order_result_keys({key: rank_candidates(key, candidates) for key, candidates in extracted.items()})
     except Exception as e:
         print(f"An error occurred: {e}")
+        record_error("score_extracted", e)
+        return {}
+
+
+def set_dynamic_probability(data):
+    extracted = {key: [Candidate(item["value"], item["source"]) for item in items] for key, items in data.items()}
+    return scored_to_json(score_extracted(extracted))
+
+
+def order_result_keys(result):
+    ordered_result = {}
+    priority_keys = ["LegalName", "Entity Name", "Business Name"]
+
+    for key in priority_keys:
+        if key in result:
+            ordered_result[key] = result.pop(key)
+
+    for key in sorted(result.keys()):
+        if "Name" in key and key not in priority_keys:
+            ordered_result[key] = result.pop(key)
+
+    ordered_result.update(result)
     return ordered_result
 
 
+def set_dynamic_probability_batch(payloads):
+    # Scores many combinedResults payloads at once; output matches
+    # process_json_input applied to each payload in turn
+    return [scored_to_json(result) for result in
+            score_extracted_batch([extract_candidates(payload) for payload in payloads])]
+
+
+@timed("score_batch")
+def score_extracted_batch(extracted):
+    # Columnar equivalent of score_extracted over many extract_candidates records.
+    # Python touches each (record, key) group once; per-candidate work is numpy
+    # or C-level map/slice calls. The batch allocates hundreds of thousands of
+    # small lists and dicts, none in cycles, which would otherwise set off
+    # repeated collections over every live candidate.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _score_batch(extracted)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _score_batch(extracted):
+    results = [{} for _ in extracted]
+
+    group_entities, group_keys, group_sizes, candidates, labels = [], [], [], [], []
+    for entity_id, data in enumerate(extracted):
+        for key, key_candidates in data.items():
+            values = [c.value for c in key_candidates]
+            labels += match_labels(key, values)
+            candidates += key_candidates
+            group_entities.append(entity_id)
+            group_keys.append(key)
+            group_sizes.append(len(key_candidates))
+    if not candidates:
+        return results
+
+    try:
+        # Groups are numbered in first-appearance order, so candidates are already grouped
+        sizes = np.asarray(group_sizes, dtype=np.int64)
+        group = np.repeat(np.arange(len(sizes), dtype=np.int64), sizes)
+        value_codes, value_uniques = pd.factorize(np.asarray(labels, dtype=object))
+        value_group, value_group_uniques = pd.factorize(group * len(value_uniques) + value_codes)
+
+        # Grouped counts: occurrences per value, distinct values and top count per key
+        value_counts = np.bincount(value_group)
+        value_key = value_group_uniques // len(value_uniques)
+        distinct = np.bincount(value_key, minlength=len(sizes))
+        max_count = np.zeros(len(sizes), dtype=value_counts.dtype)
+        np.maximum.at(max_count, value_key, value_counts)
+        max_ties = np.bincount(value_key, weights=value_counts == max_count[value_key], minlength=len(sizes))
+
+        count = value_counts[value_group]
+        at_max = count == max_count[group]
+
+        # Same codes as HIGH, MEDIUM and LOW
+        score = np.where(count > 1, MEDIUM, LOW)
+        score = np.where(at_max & (max_ties[group] == 1), HIGH, score)
+        score = np.where(distinct[group] == 1, np.where(count > 1, HIGH, MEDIUM), score)
+
+        # Items sort by score within their group; lexsort is stable, so ties keep input order
+        order = np.lexsort((-score, group))
+        bounds = np.concatenate(([0], np.cumsum(sizes))).tolist()
+    except Exception as e:
+        print(f"Error in set_dynamic_probability_batch: {e}")
+        record_error("set_dynamic_probability_batch", e)
+        return [score_extracted(data) for data in extracted]
+
+    deque(map(Candidate.score.__set__, candidates, score.tolist()), maxlen=0)
+    ordered = list(map(candidates.__getitem__, order.tolist()))
+    for g, (entity_id, key) in enumerate(zip(group_entities, group_keys)):
+        results[entity_id][key] = ordered[bounds[g]:bounds[g + 1]]
+    return [order_result_keys(result) for result in results]
+
+
+@timed("process_json_input")
 def process_json_input(json_string):
-    extracted_data = extract_keys_from_sources(json_string)
-    updated_data = set_dynamic_probability(extracted_data)
-    return updated_data
+    return scored_to_json(score_extracted(extract_candidates(json_string)))
+
+
+class EntityScorer:
+    """Scores one entity and keeps the result current as single sources change.
+
+    Each source is extracted on its own and the per-key value counts are kept,
+    so a delta re-extracts only the changed source and re-scores only the keys
+    it touches. result() equals process_json_input on the current payload.
+    State is kept as Candidate records; compact_result() returns them without
+    converting, and they must not be mutated.
+    """
+
+    def __init__(self, json_data=None, plan=None):
+        self.plan = plan if plan is not None else DEFAULT_EXTRACTION_PLAN
+        self._sources = {}
+        self._extracted = {}
+        self._counts = {}
+        self._scored = {}
+        if isinstance(json_data, (str, bytes, bytearray, memoryview)):
+            json_data = json_loads(json_data)
+        for source, source_data in (json_data or {}).get("combinedResults", {}).items():
+            self._sources[source] = source_data
+            self._extracted[source] = extracted = self._extract(source, source_data)
+            for key, candidates in extracted.items():
+                self._counts.setdefault(key, Counter()).update(c.value for c in candidates)
+        self._rescore({key for extracted in self._extracted.values() for key in extracted})
+
+    def _extract(self, source, source_data):
+        output = {}
+        if isinstance(source_data, dict):
+            process_source(source, source_data, self.plan, output)
+        elif isinstance(source_data, list):
+            for item in source_data:
+                process_source(source, item, self.plan, output)
+        return output
+
+    def _items(self, key):
+        # Same order as extract_keys_from_sources: sources in payload order
+        return [c for extracted in self._extracted.values() for c in extracted.get(key, ())]
+
+    def _rescore(self, keys):
+        for key in keys:
+            candidates = self._items(key)
+            if not candidates:
+                self._counts.pop(key, None)
+                self._scored.pop(key, None)
+            elif FUZZY_NAME_MATCHING and is_name_key(key):
+                # Cluster labels depend on every value of the key, so names are re-clustered
+                self._scored[key] = rank_candidates(key, candidates)
+            else:
+                self._scored[key] = rank_candidates(key, candidates, [c.value for c in candidates], self._counts[key])
+
+    def _update(self, source, source_data):
+        old = self._extracted.pop(source, {}) if source_data is None else self._extracted.get(source, {})
+        new = {} if source_data is None else self._extract(source, source_data)
+        for key, candidates in old.items():
+            counts = self._counts[key]
+            counts.subtract(c.value for c in candidates)
+            for c in candidates:
+                if counts[c.value] <= 0:
+                    del counts[c.value]
+        for key, candidates in new.items():
+            self._counts.setdefault(key, Counter()).update(c.value for c in candidates)
+        if source_data is None:
+            self._sources.pop(source, None)
+        else:
+            self._sources[source] = source_data
+            self._extracted[source] = new
+        changed = set(old) | set(new)
+        self._rescore(changed)
+        return changed
+
+    def replace_source(self, source, source_data):
+        # New sources go last, existing ones keep their position in the payload
+        if source_data is None:
+            raise ValueError(f"no data to replace {source} with; use remove_source to delete it")
+        return self._update(source, source_data)
+
+    def add_source(self, source, source_data):
+        # Records added to a list source are appended; anything else replaces the source
+        if source_data is None:
+            raise ValueError(f"no data to add to {source}")
+        current = self._sources.get(source)
+        if isinstance(current, list):
+            added = source_data if isinstance(source_data, list) else [source_data]
+            source_data = current + added
+        return self._update(source, source_data)
+
+    def remove_source(self, source):
+        if source not in self._sources:
+            return set()
+        return self._update(source, None)
+
+    def apply(self, delta):
+        # delta: {"op": "add" | "replace" | "remove", "source": name, "data": ...}; returns changed keys
+        try:
+            op, source = delta["op"], delta["source"]
+            if op == "remove":
+                return self.remove_source(source)
+            if op == "add":
+                return self.add_source(source, delta.get("data"))
+            if op == "replace":
+                return self.replace_source(source, delta.get("data"))
+            print(f"Error in EntityScorer.apply: unknown op {op!r}")
+        except Exception as e:
+            print(f"Error in EntityScorer.apply: {e}")
+            record_error("EntityScorer.apply", e)
+        return set()
+
+    def payload(self):
+        return {"combinedResults": dict(self._sources)}
+
+    def compact_result(self):
+        keys = dict.fromkeys(key for extracted in self._extracted.values() for key in extracted)
+        return order_result_keys({key: self._scored[key] for key in keys})
+
+    def result(self):
+        return scored_to_json(self.compact_result())
+
+
+def iter_jsonl(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def process_jsonl_record(line):
+    # Like /score/batch, a line that is not a JSON object gives an {"error": ...} line
+    try:
+        payload = json_loads(line)
+    except json.JSONDecodeError as e:
+        record_error("process_jsonl", e)
+        return {"error": f"Invalid JSON: {e}"}
+    if not isinstance(payload, dict):
+        return {"error": "Payload must be a JSON object."}
+    return process_json_input(payload)
+
+
+def _process_chunk(records):
+    return [process_jsonl_record(record) for record in records]
+
+
+def _preload_postcode_index():
+    try:
+        get_postcode_index()
+    except Exception as e:
+        print(f"Error preloading postcode index: {e}", file=sys.stderr)
+        record_error("preload_postcode_index", e)
+
+
+def _init_worker():
+    # Spawned workers start fresh: keep their diagnostics out of a JSONL stdout
+    # and build the index once per worker rather than on the first record
+    sys.stdout = sys.stderr
+    _preload_postcode_index()
+
+
+def process_jsonl(lines, workers=1, chunksize=64):
+    # Yields one scored result per input record, in input order. With workers > 1
+    # at most 2 * workers chunks are in flight, so memory stays bounded.
+    records = iter_jsonl(lines)
+    if workers <= 1:
+        for record in records:
+            yield process_jsonl_record(record)
+        return
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Forked workers inherit the loaded index and main()'s stdout redirect
+        _preload_postcode_index()
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+    with executor:
+        pending = deque()
+        while True:
+            chunk = list(islice(records, chunksize))
+            if not chunk:
+                break
+            pending.append(executor.submit(_process_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
 
 
 json_input = """{
@@ -288,5 +808,37 @@ json_input = """{
 }
 """
 
-response = process_json_input(json_input)
-print(json.dumps(response, indent=4))
\ No newline at end of file
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score combinedResults payloads read as JSONL.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file, or - for stdout")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="records sent to a worker at a time")
+    parser.add_argument("--sample", action="store_true", help="score the built-in sample payload and exit")
+    args = parser.parse_args(argv)
+
+    if args.sample:
+        print(json.dumps(process_json_input(json_input), indent=4))
+        return
+
+    # Bytes in and out: lines are parsed and written without decoding to str
+    infile = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    outfile = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        # Diagnostics are printed, so keep them out of the JSONL stream
+        with contextlib.redirect_stdout(sys.stderr):
+            for result in process_jsonl(infile, workers=args.workers, chunksize=args.chunksize):
+                outfile.write(json_dumps(result))
+                outfile.write(b"\n")
+    finally:
+        if infile is not sys.stdin.buffer:
+            infile.close()
+        if outfile is not sys.stdout.buffer:
+            outfile.close()
+        else:
+            outfile.flush()
+
+
+if __name__ == "__main__":
+    main()
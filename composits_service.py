@@ -0,0 +1,210 @@
+"""HTTP service for composite scoring.
+
+POST /score takes one combinedResults payload and returns the scored
+result. POST /score/batch takes NDJSON payloads and returns NDJSON results
+in input order. Bodies are parsed straight from bytes and responses are
+compact JSON, through orjson when it is installed.
+
+The postcode index is built when this module is imported, so a prefork
+server loads it once and its workers share the pages copy-on-write:
+
+    python composits_service.py --workers 4
+    gunicorn composits_service:app --preload -w 4 -k uvicorn.workers.UvicornWorker
+
+Each worker keeps its own /metrics.
+"""
+import argparse
+import gc
+import json
+import os
+import re
+import signal
+import socket
+import sys
+from itertools import islice
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+
+from composits import extract_candidates, get_postcode_index, process_json_input, score_extracted_batch, scored_to_json
+from fast_json import JSON_BACKEND, dumps, loads
+from instrumentation import install_metrics, profile_if_slow
+
+# Build the postcode index at import time, before any worker fork
+PRELOAD_POSTCODE_INDEX = os.environ.get("COMPOSITS_PRELOAD_POSTCODES", "1") != "0"
+# Payloads scored together by the columnar batch scorer
+BATCH_CHUNK_SIZE = int(os.environ.get("COMPOSITS_BATCH_CHUNK_SIZE", "256"))
+# Bodies up to this size are scored on the event loop; larger ones go to the threadpool
+INLINE_SCORE_BYTES = int(os.environ.get("COMPOSITS_INLINE_SCORE_BYTES", str(64 * 1024)))
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = int(os.environ.get("COMPOSITS_MAX_BODY_BYTES", str(64 * 1024 * 1024)))
+
+app = FastAPI()
+install_metrics(app, "composits")
+
+
+def preload_postcode_index():
+    try:
+        get_postcode_index()
+        # Keep the collector from writing to the index's pages, which would copy them per worker
+        gc.freeze()
+    except Exception as e:
+        print(f"Error preloading postcode index: {e}")
+
+
+if PRELOAD_POSTCODE_INDEX:
+    preload_postcode_index()
+
+
+_NDJSON_LINE = re.compile(rb"[^\n]*\S[^\n]*")
+
+
+def iter_ndjson_lines(body):
+    # Zero-copy views of the non-blank lines of body
+    view = memoryview(body)
+    for match in _NDJSON_LINE.finditer(body):
+        yield view[match.start():match.end()]
+
+
+def _error(status_code, detail):
+    return Response(content=dumps({"detail": detail}), status_code=status_code, media_type="application/json")
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(request):
+    # Refuses an oversized body from its Content-Length before reading any of it,
+    # and stops reading a chunked one as soon as it passes MAX_BODY_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+        raise BodyTooLarge()
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise BodyTooLarge()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok", "json_backend": JSON_BACKEND}
+
+
+# Also covers bodies scored on the threadpool, which the per-request profiler cannot see
+@profile_if_slow("composits/scoring")
+def _score_body(body):
+    try:
+        payload = loads(body)
+    except json.JSONDecodeError as e:
+        return _error(400, f"Invalid JSON: {e}")
+    if not isinstance(payload, dict):
+        return _error(400, "Payload must be a JSON object.")
+    return Response(content=dumps(process_json_input(payload)), media_type="application/json")
+
+
+@app.post("/score")
+async def score(request: Request):
+    # Typical payloads score faster inline than the thread handoff costs; large ones
+    # would hold up every other request on the loop, /health and /metrics included
+    try:
+        body = await _read_body(request)
+    except BodyTooLarge:
+        return _error(413, f"Body larger than {MAX_BODY_BYTES} bytes.")
+    if len(body) > INLINE_SCORE_BYTES:
+        return await run_in_threadpool(_score_body, body)
+    return _score_body(body)
+
+
+def _score_lines(body):
+    # Lines that are not a JSON object get an {"error": ...} line in their place.
+    # A sync generator, so the response streams it from the threadpool.
+    lines = iter_ndjson_lines(body)
+    while True:
+        chunk, errors = [], {}
+        for i, line in enumerate(islice(lines, BATCH_CHUNK_SIZE)):
+            try:
+                payload = loads(line)
+            except json.JSONDecodeError as e:
+                payload = None
+                errors[i] = dumps({"error": f"Invalid JSON: {e}"})
+            if isinstance(payload, dict):
+                chunk.append(extract_candidates(payload))
+            else:
+                chunk.append({})
+                errors.setdefault(i, dumps({"error": "Payload must be a JSON object."}))
+        if not chunk:
+            return
+        scored = score_extracted_batch(chunk)
+        yield b"".join((errors.get(i) or dumps(scored_to_json(result))) + b"\n" for i, result in enumerate(scored))
+
+
+@app.post("/score/batch")
+async def score_batch(request: Request):
+    # NDJSON in, NDJSON out: one result line per non-blank input line, in order
+    try:
+        body = await _read_body(request)
+    except BodyTooLarge:
+        return _error(413, f"Body larger than {MAX_BODY_BYTES} bytes.")
+    return StreamingResponse(_score_lines(body), media_type="application/x-ndjson")
+
+
+def _listen(host, port):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Accepted connections inherit this; without it small responses wait on delayed ACKs
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(host="0.0.0.0", port=8002, workers=1):
+    # Fork-after-load: the index is already built, and every worker accepts on one shared socket
+    import uvicorn
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.run(app, host=host, port=port)
+        return
+
+    sock = _listen(host, port)
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+            server.run(sockets=[sock])
+            os._exit(0)
+        children.append(pid)
+    print(f"serving on {host}:{port} with {workers} workers ({JSON_BACKEND})", file=sys.stderr)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for pid in children:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve composite scoring over HTTP.")
+    parser.add_argument("--host", default=os.environ.get("COMPOSITS_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("COMPOSITS_PORT", "8002")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("COMPOSITS_WORKERS", "1")))
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
@@ -0,0 +1,264 @@
+"""Blocking index for finding the same business across extracted records.
+
+Each entity is reduced to blocking keys: its ABN and ACN digits, the tokens
+of its name-like values, and each name token paired with a postcode. Legal
+forms and filler words ("PTY", "LTD", "THE") are dropped from names first.
+The postings for those keys live in SQLite, clustered by key, so looking up
+the candidates for a new record reads a few short posting lists and never
+compares it with the whole corpus. Keys shared by more than
+ENTITY_INDEX_MAX_POSTINGS entities (a common word, a busy postcode) say
+little about identity, so they are skipped at query time.
+
+    python entity_index.py add book.jsonl --db entities.sqlite > candidates.jsonl
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import Counter, defaultdict
+
+from name_matching import normalise_name
+
+# Posting lists longer than this are too common to block on
+ENTITY_INDEX_MAX_POSTINGS = int(os.environ.get("ENTITY_INDEX_MAX_POSTINGS", "1000"))
+# Candidates scoring below this are not reported
+ENTITY_MATCH_MIN_SCORE = float(os.environ.get("ENTITY_MATCH_MIN_SCORE", "0.5"))
+# SQLite page cache per connection, in KiB; the index itself stays on disk
+ENTITY_INDEX_CACHE_KB = int(os.environ.get("ENTITY_INDEX_CACHE_KB", "65536"))
+
+# Identifier keys settle a match on their own; name and postcode keys add up
+IDENTIFIER_KEYS = {"ABN": "abn", "ACN": "acn"}
+POSTCODE_KEY = "Postal code"
+FIELD_WEIGHTS = {"abn": 1.0, "acn": 1.0, "name": 0.6, "name_postcode": 0.3}
+NAME_FIELDS = ("name", "name_postcode")
+# Legal forms and filler words; "KBBK SOLUTIONS PTY LTD" blocks and scores as "KBBK SOLUTIONS"
+NAME_STOP_TOKENS = frozenset({
+    "PTY", "PTE", "LTD", "LIMITED", "PROPRIETARY", "P", "L", "CO", "COMPANY", "CORP", "CORPORATION",
+    "INC", "INCORPORATED", "LLC", "PLC", "NL", "THE", "AND", "OF", "T", "A", "AS", "ATF", "TRADING",
+})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    entity_id TEXT PRIMARY KEY,
+    keys TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    field TEXT,
+    token TEXT,
+    entity_id TEXT,
+    size INTEGER,
+    PRIMARY KEY (field, token, entity_id)
+) WITHOUT ROWID;
+"""
+
+_NON_DIGIT = re.compile(r"\D+")
+
+
+def _values(extracted, key):
+    return [item["value"] for item in extracted.get(key, ())]
+
+
+def blocking_keys(extracted):
+    # extract_keys_from_sources output -> sorted unique (field, token) pairs
+    keys = set()
+    for key, field in IDENTIFIER_KEYS.items():
+        for value in _values(extracted, key):
+            digits = _NON_DIGIT.sub("", str(value))
+            if digits:
+                keys.add((field, digits))
+
+    tokens = set()
+    for key in extracted:
+        if "name" in key.lower():
+            for value in _values(extracted, key):
+                tokens.update(normalise_name(value).split())
+    tokens -= NAME_STOP_TOKENS
+    postcodes = {_NON_DIGIT.sub("", str(value)) for value in _values(extracted, POSTCODE_KEY)}
+    postcodes.discard("")
+    for token in tokens:
+        keys.add(("name", token))
+        for postcode in postcodes:
+            keys.add(("name_postcode", f"{token}|{postcode}"))
+    return sorted(keys)
+
+
+def score_candidates(keys, postings, skipped=()):
+    """Scores entities sharing blocking keys with a record.
+
+    postings maps each key to {entity_id: the entity's number of keys in that
+    field}. Name keys count by the Dice overlap of the two records' name keys,
+    so one shared word of a four-word name is weak evidence, the full name is
+    strong, and the score does not depend on which record was indexed first.
+    """
+    usable = defaultdict(int)
+    for field, token in keys:
+        if (field, token) not in skipped:
+            usable[field] += 1
+
+    matched = defaultdict(lambda: defaultdict(int))
+    sizes = defaultdict(dict)
+    for (field, _), entities in postings.items():
+        for entity_id, size in entities.items():
+            matched[entity_id][field] += 1
+            sizes[entity_id][field] = size
+
+    candidates = []
+    for entity_id, fields in matched.items():
+        score = 0.0
+        for field, count in fields.items():
+            if field in NAME_FIELDS:
+                # Rows written before sizes were stored count as the same size as this record
+                other = sizes[entity_id][field] or usable[field]
+                score += FIELD_WEIGHTS[field] * min(1.0, 2 * count / (usable[field] + other))
+            else:
+                score += FIELD_WEIGHTS[field]
+        candidates.append({"entity_id": entity_id, "score": round(min(score, 1.0), 4),
+                           "matched": sorted(fields)})
+    candidates.sort(key=lambda c: (-c["score"], c["entity_id"]))
+    return candidates
+
+
+class EntityIndex:
+    """SQLite-backed inverted index over extracted records, keyed by entity id.
+
+    Memory use is bounded by the SQLite page cache and the longest posting
+    list read, not by the number of entities indexed.
+    """
+
+    def __init__(self, db_path=":memory:", max_postings=None, cache_kb=None):
+        self.db_path = db_path
+        self.max_postings = ENTITY_INDEX_MAX_POSTINGS if max_postings is None else max_postings
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(f"PRAGMA cache_size=-{ENTITY_INDEX_CACHE_KB if cache_kb is None else cache_kb}")
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        if "size" not in {row[1] for row in self._conn.execute("PRAGMA table_info(postings)")}:
+            self._conn.execute("ALTER TABLE postings ADD COLUMN size INTEGER")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def _postings(self, keys):
+        # {entity_id: size} per key, leaving out keys over the posting limit
+        postings, skipped = {}, set()
+        for field, token in keys:
+            rows = self._conn.execute(
+                "SELECT entity_id, size FROM postings WHERE field = ? AND token = ? LIMIT ?",
+                (field, token, self.max_postings + 1)).fetchall()
+            if len(rows) > self.max_postings:
+                skipped.add((field, token))
+            elif rows:
+                postings[(field, token)] = dict(rows)
+        return postings, skipped
+
+    def _remove(self, entity_id):
+        row = self._conn.execute("SELECT keys FROM entities WHERE entity_id = ?", (entity_id,)).fetchone()
+        if row is None:
+            return False
+        self._conn.executemany("DELETE FROM postings WHERE field = ? AND token = ? AND entity_id = ?",
+                               [(field, token, entity_id) for field, token in json.loads(row[0])])
+        self._conn.execute("DELETE FROM entities WHERE entity_id = ?", (entity_id,))
+        return True
+
+    def _insert(self, entity_id, keys):
+        self._remove(entity_id)
+        self._conn.execute("INSERT INTO entities VALUES (?, ?)",
+                           (entity_id, json.dumps(keys, separators=(",", ":"))))
+        sizes = Counter(field for field, _ in keys)
+        self._conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?)",
+                               [(field, token, entity_id, sizes[field]) for field, token in keys])
+
+    def candidates(self, extracted, limit=20, min_score=None, exclude=None):
+        # Entities likely to be the same business as this extracted record
+        min_score = ENTITY_MATCH_MIN_SCORE if min_score is None else min_score
+        keys = blocking_keys(extracted)
+        with self._lock:
+            postings, skipped = self._postings(keys)
+        found = [c for c in score_candidates(keys, postings, skipped)
+                 if c["score"] >= min_score and c["entity_id"] != exclude]
+        return found[:limit]
+
+    def add(self, entity_id, extracted, limit=20, min_score=None):
+        """Indexes a record and returns its candidate duplicates among the entities already indexed.
+
+        Adding an id that is already indexed replaces its earlier record.
+        """
+        entity_id = str(entity_id)
+        min_score = ENTITY_MATCH_MIN_SCORE if min_score is None else min_score
+        keys = blocking_keys(extracted)
+        with self._lock:
+            postings, skipped = self._postings(keys)
+            self._insert(entity_id, keys)
+            self._conn.commit()
+        found = [c for c in score_candidates(keys, postings, skipped)
+                 if c["score"] >= min_score and c["entity_id"] != entity_id]
+        return found[:limit]
+
+    def add_many(self, records, batch_size=10000):
+        # Bulk load of (entity_id, extracted) pairs without candidate lookups
+        added = 0
+        with self._lock:
+            for entity_id, extracted in records:
+                self._insert(str(entity_id), blocking_keys(extracted))
+                added += 1
+                if added % batch_size == 0:
+                    self._conn.commit()
+            self._conn.commit()
+        return added
+
+    def remove(self, entity_id):
+        with self._lock:
+            removed = self._remove(str(entity_id))
+            self._conn.commit()
+        return removed
+
+    def close(self):
+        self._conn.close()
+
+
+def _entity_id(payload, id_field, line_number):
+    if isinstance(payload, dict) and payload.get(id_field) not in (None, ""):
+        return str(payload[id_field])
+    return str(line_number)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index combinedResults payloads and report likely duplicates.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    add_parser = subcommands.add_parser("add", help="index JSONL payloads, printing candidates for each as JSONL")
+    add_parser.add_argument("input", nargs="?", default="-", help="JSONL file, or - for stdin")
+    add_parser.add_argument("--db", default=os.environ.get("ENTITY_INDEX_DB", "entity_index.sqlite"))
+    add_parser.add_argument("--id-field", default="id", help="payload field holding the entity id; line number if absent")
+    add_parser.add_argument("--limit", type=int, default=20)
+    remove_parser = subcommands.add_parser("remove", help="drop entities from the index")
+    remove_parser.add_argument("entity_ids", nargs="+")
+    remove_parser.add_argument("--db", default=os.environ.get("ENTITY_INDEX_DB", "entity_index.sqlite"))
+    args = parser.parse_args()
+
+    index = EntityIndex(args.db)
+    if args.command == "remove":
+        for entity_id in args.entity_ids:
+            print(f"{entity_id}: {'removed' if index.remove(entity_id) else 'not indexed'}")
+    else:
+        from composits import extract_keys_from_sources
+
+        infile = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        for line_number, line in enumerate(infile, 1):
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            entity_id = _entity_id(payload, args.id_field, line_number)
+            # Extraction diagnostics are printed, so keep them out of the JSONL stream
+            with contextlib.redirect_stdout(sys.stderr):
+                extracted = extract_keys_from_sources(payload)
+            found = index.add(entity_id, extracted, limit=args.limit)
+            print(json.dumps({"entity_id": entity_id, "candidates": found}))
+    index.close()
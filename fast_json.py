@@ -0,0 +1,33 @@
+"""JSON parsing and serialisation through orjson when it is installed, else the stdlib.
+
+loads() takes str, bytes, bytearray or memoryview, and with orjson parses
+bytes directly without decoding them to str first. dumps() returns compact
+UTF-8 bytes. Decode errors are json.JSONDecodeError with either backend.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        # Decoded here so invalid UTF-8 fails as a JSONDecodeError, as it does with orjson
+        data = bytes(data)
+        try:
+            data = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise json.JSONDecodeError(f"Invalid UTF-8 ({e.reason})", data.decode("utf-8", "replace"), e.start) from None
+    return json.loads(data)
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,259 @@
+"""Process-wide stage timers, counters and latency histograms.
+
+Everything is recorded into one registry and rendered in the Prometheus
+text format by install_metrics(), which also adds a /metrics route and a
+per-request latency histogram to a FastAPI app.
+
+Setting PROFILE_SLOW_SECONDS turns on the sampling profiler: a share
+(PROFILE_SAMPLE_RATE) of requests run under cProfile, and those slower than
+the threshold have their stats dumped to PROFILE_DIR for `python -m pstats`.
+cProfile follows the thread that starts it, so work handed to worker
+threads is profiled there with profile_if_slow().
+"""
+import bisect
+import cProfile
+import functools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+# 0 disables the profiler
+PROFILE_SLOW_SECONDS = float(os.environ.get("PROFILE_SLOW_SECONDS", "0"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0.05"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRIC_HELP = {
+    "stage_seconds": "Time spent in each processing stage.",
+    "http_request_seconds": "Request latency up to the response headers, by route and status.",
+    "upstream_request_seconds": "Latency of each upstream HTTP attempt, by upstream and status.",
+    "browser_phase_seconds": "Headless browser time per register lookup phase.",
+    "errors_total": "Failures caught and handled, by where they happened and exception type.",
+    "fields_skipped_total": "Source fields that map to no output key, by source.",
+    "upstream_retries_total": "Upstream HTTP attempts that were retried.",
+    "requests_rejected_total": "Requests turned away because the service was saturated.",
+    "profiles_written_total": "cProfile dumps written for slow requests.",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by name and label set."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, enabled=METRICS_ENABLED):
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = {}
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket plus +Inf, then the sum
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[position] += 1
+            histogram[-1] += value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def collector(self, name, kind, collect, help_text=""):
+        # Values owned elsewhere: collect() returns {label tuple: value} at render time
+        with self._lock:
+            self._collectors.setdefault((name, kind, help_text), []).append(collect)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+            collectors = [(key, list(collects)) for key, collects in sorted(self._collectors.items())]
+
+        lines = []
+        described = set()
+
+        def describe(name, kind, help_text=None):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {help_text or METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_labels_text(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), histogram):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels_text(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {histogram[-1]}")
+            lines.append(f"{name}_count{_labels_text(labels)} {cumulative}")
+        for (name, kind, help_text), collects in collectors:
+            for collect in collects:
+                try:
+                    values = collect()
+                except Exception as e:
+                    print(f"Error collecting {name}: {e}")
+                    continue
+                describe(name, kind, help_text)
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{name}{_labels_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def inc(name, amount=1, **labels):
+    metrics.inc(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    metrics.observe(name, value, **labels)
+
+
+def timer(name, **labels):
+    return metrics.timer(name, **labels)
+
+
+def stage_timer(stage):
+    return metrics.timer("stage_seconds", stage=stage)
+
+
+def timed(stage):
+    # Decorator form of stage_timer
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metrics.timer("stage_seconds", stage=stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_error(where, error):
+    metrics.inc("errors_total", where=where, type=type(error).__name__)
+
+
+_profiling = threading.local()
+
+
+@contextmanager
+def profile_if_slow(name):
+    """Runs a sampled share of calls under cProfile and keeps the slow ones.
+
+    Only the calling thread is profiled, so wrap work where it runs: a
+    request whose work is done on a worker thread should be profiled on
+    that thread. One call per thread is profiled at a time, and everything
+    that thread runs meanwhile is recorded, so a dump taken on the event
+    loop may include other requests' work.
+    """
+    if (PROFILE_SLOW_SECONDS <= 0 or random.random() >= PROFILE_SAMPLE_RATE
+            or getattr(_profiling, "active", False)):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    _profiling.active = True
+    try:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (from 3.12 cProfile is process-wide)
+            profiler = None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    finally:
+        _profiling.active = False
+
+    elapsed = time.perf_counter() - start
+    if profiler is not None and elapsed >= PROFILE_SLOW_SECONDS:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "request"
+            path = os.path.join(PROFILE_DIR, f"{slug}-{time.strftime('%Y%m%dT%H%M%S')}-{elapsed * 1000:.0f}ms.prof")
+            profiler.dump_stats(path)
+            metrics.inc("profiles_written_total")
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+
+
+def install_metrics(app, service, cache_stats=None, profile_requests=True):
+    # Adds GET /metrics and request latency, and profiles slow requests when enabled.
+    # cache_stats() returns a LookupCache's stats dict, exported as counters.
+    # Services whose requests mostly wait on worker threads pass profile_requests=False
+    # and profile on those threads instead.
+    from fastapi.responses import PlainTextResponse
+
+    if cache_stats is not None:
+        metrics.collector("lookup_cache_events_total", "counter",
+                          lambda: {(("event", event), ("service", service)): count
+                                   for event, count in cache_stats().items()},
+                          "Lookup cache hits, disk hits, misses and coalesced calls.")
+
+    @app.middleware("http")
+    async def record_request(request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            if profile_requests:
+                with profile_if_slow(f"{service}{request.url.path}"):
+                    response = await call_next(request)
+            else:
+                response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Route templates, not raw paths, keep the label set bounded
+            route = request.scope.get("route")
+            observe("http_request_seconds", time.perf_counter() - start, service=service,
+                    route=getattr(route, "path", "unmatched"), status=str(status))
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,250 @@
+"""Offline LEI backend built from a GLEIF golden-copy file.
+
+The golden copy is streamed into SQLite: one row per LEI with indexed
+name/city/postal code/registration columns, an FTS5 index over legal
+names, and the record itself stored in the lei-records API shape so it
+maps exactly like a live API response.
+
+    python lei_golden_copy.py import 20241001-gleif-concatenated-file-lei2.csv.zip --db gleif.sqlite
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import urllib.parse
+import zipfile
+
+IMPORT_BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lei_records (
+    lei TEXT PRIMARY KEY,
+    legal_name TEXT,
+    city TEXT,
+    hq_city TEXT,
+    postal_code TEXT,
+    hq_postal_code TEXT,
+    registration_authority_id TEXT,
+    registered_as TEXT,
+    record TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS lei_names USING fts5(
+    legal_name, content='lei_records', content_rowid='rowid'
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS lei_records_city ON lei_records (city);
+CREATE INDEX IF NOT EXISTS lei_records_hq_city ON lei_records (hq_city);
+CREATE INDEX IF NOT EXISTS lei_records_postal_code ON lei_records (postal_code);
+CREATE INDEX IF NOT EXISTS lei_records_hq_postal_code ON lei_records (hq_postal_code);
+CREATE INDEX IF NOT EXISTS lei_records_registered_as ON lei_records (registered_as, registration_authority_id);
+"""
+
+
+def _address_from_csv(row, prefix):
+    lines = [row.get(f"{prefix}.FirstAddressLine", "")]
+    lines += [row.get(f"{prefix}.AdditionalAddressLine.{i}", "") for i in range(1, 4)]
+    return {
+        "language": row.get(f"{prefix}.xmllang", ""),
+        "addressLines": [line for line in lines if line],
+        "city": row.get(f"{prefix}.City", ""),
+        "region": row.get(f"{prefix}.Region", ""),
+        "country": row.get(f"{prefix}.Country", ""),
+        "postalCode": row.get(f"{prefix}.PostalCode", ""),
+    }
+
+
+def csv_row_to_api_record(row):
+    # Golden-copy CSV columns -> the lei-records API shape read by map_lei_record
+    other_names = [row[column] for column in sorted(row)
+                   if column and column.startswith("Entity.OtherEntityNames.OtherEntityName.")
+                   and not column.endswith(("xmllang", "type")) and row[column]]
+    lei = row.get("LEI", "")
+    return {
+        "type": "lei-records",
+        "id": lei,
+        "attributes": {
+            "lei": lei,
+            "entity": {
+                "legalName": {"name": row.get("Entity.LegalName", ""),
+                              "language": row.get("Entity.LegalName.xmllang", "")},
+                "otherEntityNames": {"OtherEntityName": other_names} if other_names else {},
+                "legalAddress": _address_from_csv(row, "Entity.LegalAddress"),
+                "headquartersAddress": _address_from_csv(row, "Entity.HeadquartersAddress"),
+                "registrationAuthority": {
+                    "RegistrationAuthorityID": row.get("Entity.RegistrationAuthority.RegistrationAuthorityID", ""),
+                    "RegistrationAuthorityEntityID": row.get("Entity.RegistrationAuthority.RegistrationAuthorityEntityID", ""),
+                },
+                "registeredAs": row.get("Entity.RegistrationAuthority.RegistrationAuthorityEntityID", ""),
+                "legalJurisdiction": row.get("Entity.LegalJurisdiction", ""),
+                "entityCategory": row.get("Entity.EntityCategory", ""),
+                "legalForm": {"EntityLegalFormCode": row.get("Entity.LegalForm.EntityLegalFormCode", "")},
+                "entityStatus": row.get("Entity.EntityStatus", ""),
+                "entityCreationDate": row.get("Entity.EntityCreationDate", ""),
+            },
+            "registration": {
+                "initialRegistrationDate": row.get("Registration.InitialRegistrationDate", ""),
+                "lastUpdateDate": row.get("Registration.LastUpdateDate", ""),
+                "registrationStatus": row.get("Registration.RegistrationStatus", ""),
+                "nextRenewalDate": row.get("Registration.NextRenewalDate", ""),
+                "managingLou": row.get("Registration.ManagingLOU", ""),
+                "validationSources": row.get("Registration.ValidationSources", ""),
+                "validationAuthority": {
+                    "ValidationAuthorityID": row.get("Registration.ValidationAuthority.ValidationAuthorityID", ""),
+                    "ValidationAuthorityEntityID": row.get("Registration.ValidationAuthority.ValidationAuthorityEntityID", ""),
+                },
+            },
+        },
+    }
+
+
+def _open_text(path):
+    # Plain files, or the first member of a .zip as published by GLEIF
+    if path.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+        return io.TextIOWrapper(archive.open(archive.namelist()[0]), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def iter_golden_copy(path):
+    # CSV golden copy, or JSON Lines of lei-records API records
+    with _open_text(path) as f:
+        if ".jsonl" in path or ".ndjson" in path:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield csv_row_to_api_record(row)
+
+
+def _normalise(value):
+    return " ".join((value or "").split()).upper()
+
+
+def _index_row(record):
+    attributes = record.get("attributes", {})
+    entity = attributes.get("entity", {})
+    legal_address = entity.get("legalAddress") or {}
+    hq_address = entity.get("headquartersAddress") or {}
+    authority = entity.get("registrationAuthority") or {}
+    return (
+        attributes.get("lei", ""),
+        (entity.get("legalName") or {}).get("name", ""),
+        _normalise(legal_address.get("city")),
+        _normalise(hq_address.get("city")),
+        _normalise(legal_address.get("postalCode")),
+        _normalise(hq_address.get("postalCode")),
+        authority.get("RegistrationAuthorityID", ""),
+        entity.get("registeredAs") or authority.get("RegistrationAuthorityEntityID", ""),
+        json.dumps(record, separators=(",", ":")),
+    )
+
+
+class GoldenCopyIndex:
+    def __init__(self, db_path, read_only=False):
+        # read_only opens an existing, imported index and raises if there is none,
+        # rather than creating an empty database that answers every lookup with []
+        self.db_path = db_path
+        if read_only:
+            if not os.path.isfile(db_path):
+                raise FileNotFoundError(f"LEI golden-copy index {db_path} does not exist; build it with "
+                                        f"'python lei_golden_copy.py import ...'")
+            uri = f"file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            try:
+                has_rows = self._conn.execute("SELECT 1 FROM lei_records LIMIT 1").fetchone() is not None
+            except sqlite3.DatabaseError as e:
+                self._conn.close()
+                raise ValueError(f"{db_path} is not an LEI golden-copy index: {e}") from e
+            if not has_rows:
+                self._conn.close()
+                raise ValueError(f"LEI golden-copy index {db_path} has no records")
+        else:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def import_file(self, path, batch_size=IMPORT_BATCH_SIZE):
+        # Streams the file in batches; memory use is bounded by batch_size
+        imported = 0
+        batch = []
+        with self._lock:
+            for record in iter_golden_copy(path):
+                batch.append(_index_row(record))
+                if len(batch) >= batch_size:
+                    imported += self._insert(batch)
+                    batch = []
+            if batch:
+                imported += self._insert(batch)
+            self._conn.executescript(INDEXES)
+            self._conn.execute("INSERT INTO lei_names(lei_names) VALUES ('rebuild')")
+            self._conn.commit()
+        return imported
+
+    def _insert(self, rows):
+        self._conn.executemany("INSERT OR REPLACE INTO lei_records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._conn.commit()
+        return len(rows)
+
+    def search(self, filters, limit=1000, truncation=None):
+        # Same filter names as the GLEIF API; returns lei-records API records, at most limit of them.
+        # When more match, truncation (if given) is filled in with the limit
+        clauses, args = [], []
+        legal_name = filters.get("filter[entity.legalName]")
+        if legal_name:
+            tokens = re.findall(r"\w+", legal_name)
+            if not tokens:
+                return []
+            clauses.append("rowid IN (SELECT rowid FROM lei_names WHERE lei_names MATCH ?)")
+            args.append(" ".join(f'"{token}"' for token in tokens))
+        city = filters.get("filter[entity.addresses.city]")
+        if city:
+            clauses.append("(city = ? OR hq_city = ?)")
+            args += [_normalise(city)] * 2
+        postal_code = filters.get("filter[entity.addresses.postalCode]")
+        if postal_code:
+            clauses.append("(postal_code = ? OR hq_postal_code = ?)")
+            args += [_normalise(postal_code)] * 2
+        for name, column in (("filter[lei]", "lei"), ("filter[entity.registeredAs]", "registered_as")):
+            values = [value.strip() for value in (filters.get(name) or "").split(",") if value.strip()]
+            if values:
+                if column == "lei":
+                    values = [value.upper() for value in values]
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                args += values
+        if not clauses:
+            return []
+
+        sql = f"SELECT record FROM lei_records WHERE {' AND '.join(clauses)} ORDER BY lei LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, args + [limit + 1]).fetchall()
+        if len(rows) > limit:
+            print(f"Golden copy query {filters} matched more than {limit} records, returning only the first {limit}")
+            rows = rows[:limit]
+            if truncation is not None:
+                truncation.update(limit=limit, total=None)
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the offline LEI index from a GLEIF golden copy.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    import_parser = subcommands.add_parser("import", help="stream a golden-copy CSV/JSONL (optionally .zip) into the index")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--db", default=os.environ.get("LEI_GOLDEN_COPY_DB", "gleif_golden_copy.sqlite"))
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    index = GoldenCopyIndex(args.db)
+    count = index.import_file(args.path, batch_size=args.batch_size)
+    index.close()
+    print(f"imported {count} records into {args.db}")
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+# Seconds between sweeps of expired rows from the SQLite tier, done on write
+DISK_PURGE_SECONDS = float(os.environ.get("LOOKUP_CACHE_PURGE_SECONDS", "300"))
+
+
+def make_cache_key(namespace, **params):
+    # Case and whitespace differences in query parameters share one entry
+    normalised = {key: " ".join(str(value).split()).lower()
+                  for key, value in params.items() if value not in (None, "")}
+    return f"{namespace}:{json.dumps(normalised, sort_keys=True)}"
+
+
+class LookupCache:
+    """In-memory LRU with a TTL, optionally backed by SQLite so entries survive restarts.
+
+    Concurrent lookups of the same key share one upstream call. Cached values
+    are returned as-is to every caller, so callers must not mutate them.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, sqlite_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._next_purge = 0.0
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS lookup_cache "
+                             "(key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS lookup_cache_expires_at ON lookup_cache (expires_at)")
+            self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key, now):
+        if self._db is None:
+            return _MISSING
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT expires_at, value FROM lookup_cache WHERE key = ?",
+                                       (key,)).fetchone()
+            if row is not None and row[0] > now:
+                return row[0], json.loads(row[1])
+        except Exception as e:
+            print(f"Error reading lookup cache: {e}")
+        return _MISSING
+
+    def _write_disk(self, key, expires_at, value):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute("INSERT OR REPLACE INTO lookup_cache VALUES (?, ?, ?)",
+                                 (key, expires_at, json.dumps(value)))
+                now = time.time()
+                if now >= self._next_purge:
+                    # Expired rows are never read again; without this the file only grows
+                    self._db.execute("DELETE FROM lookup_cache WHERE expires_at <= ?", (now,))
+                    self._next_purge = now + DISK_PURGE_SECONDS
+                self._db.commit()
+        except Exception as e:
+            print(f"Error writing lookup cache: {e}")
+
+    def _get_memory(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+        return _MISSING
+
+    def _settle_disk(self, key, entry):
+        with self._lock:
+            if entry is _MISSING:
+                self.stats["misses"] += 1
+                return _MISSING
+            self._remember(key, *entry)
+            self.stats["disk_hits"] += 1
+        return entry[1]
+
+    async def aget(self, key, default=None):
+        # The SQLite tier is read on a worker thread so the event loop never blocks on it
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is _MISSING:
+            entry = await asyncio.to_thread(self._read_disk, key, now) if self._db is not None else _MISSING
+            value = self._settle_disk(key, entry)
+        return default if value is _MISSING else value
+
+    async def aset(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._write_disk, key, expires_at, value)
+
+    def invalidate(self, key=None, prefix=None):
+        # Drops one key, every key under a prefix, or everything; returns the in-memory count removed
+        with self._lock:
+            if key is not None:
+                removed = [key] if key in self._entries else []
+            elif prefix is not None:
+                removed = [k for k in self._entries if k.startswith(prefix)]
+            else:
+                removed = list(self._entries)
+            for k in removed:
+                del self._entries[k]
+
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    if key is not None:
+                        self._db.execute("DELETE FROM lookup_cache WHERE key = ?", (key,))
+                    elif prefix is not None:
+                        self._db.execute("DELETE FROM lookup_cache WHERE substr(key, 1, ?) = ?",
+                                         (len(prefix), prefix))
+                    else:
+                        self._db.execute("DELETE FROM lookup_cache")
+                    self._db.commit()
+            except Exception as e:
+                print(f"Error invalidating lookup cache: {e}")
+        return len(removed)
+
+    async def _acompute(self, key, compute, should_cache):
+        try:
+            value = await self.aget(key, _MISSING)
+            if value is _MISSING:
+                value = await compute()
+                if should_cache is None or should_cache(value):
+                    await self.aset(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def aget_or_compute(self, key, compute, should_cache=None):
+        # compute is a coroutine function run in its own task and awaited
+        # through shield, so a caller that is cancelled does not cancel the others waiting
+        # on the same key. Every caller gets the shared call's result or exception; only
+        # if that task is itself cancelled does a waiting caller start another.
+        while True:
+            value = self._get_memory(key, time.time())
+            if value is not _MISSING:
+                return value
+
+            task = self._inflight.get(key)
+            leader = task is None
+            if leader:
+                task = asyncio.get_running_loop().create_task(self._acompute(key, compute, should_cache))
+                # Mark a failure retrieved even when every caller has gone away
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self._inflight[key] = task
+            else:
+                with self._lock:
+                    self.stats["coalesced"] += 1
+
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                # Our own cancellation, or the shared task's as the leader
+                if leader or not task.cancelled():
+                    raise
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+def cache_from_env(prefix):
+    # e.g. TPB_CACHE_TTL, TPB_CACHE_SIZE, TPB_CACHE_DB
+    return LookupCache(
+        max_entries=int(os.environ.get(f"{prefix}_CACHE_SIZE", "1024")),
+        ttl=float(os.environ.get(f"{prefix}_CACHE_TTL", "3600")),
+        sqlite_path=os.environ.get(f"{prefix}_CACHE_DB") or None,
+    )
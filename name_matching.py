@@ -0,0 +1,96 @@
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+# Minimum trigram Dice similarity for two names to count as the same value
+NAME_SIMILARITY_THRESHOLD = float(os.environ.get("NAME_SIMILARITY_THRESHOLD", "0.8"))
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]+")
+_DIGITS = re.compile(r"[0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def _normalise_str(value):
+    return _NON_ALNUM.sub(" ", value.upper()).strip()
+
+
+def normalise_name(value):
+    # "KBBK. SOLUTIONS" and "kbbk solutions" both become "KBBK SOLUTIONS"
+    return _normalise_str(str(value))
+
+
+@lru_cache(maxsize=65536)
+def name_trigrams(normalised):
+    padded = f"  {normalised} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@lru_cache(maxsize=65536)
+def name_numbers(normalised):
+    # "ABC HOLDINGS 01 PTY LTD" -> (1,); numbered companies and trusts differ only here
+    return tuple(int(digits) for digits in _DIGITS.findall(normalised))
+
+
+def dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 1.0
+
+
+def cluster_names(values, threshold=None):
+    """Groups similar names; returns {value: label}, the label being the first value of its cluster.
+
+    Values with the same normalised form always share a cluster. Other pairs
+    are joined when they carry the same numbers and their trigram Dice
+    similarity reaches the threshold.
+    Candidates come from a prefix-filtered trigram index: trigrams are ordered
+    rarest first, and only the first few of each name are indexed and probed.
+    Any pair over the threshold must share one of those, so the result matches
+    an all-pairs comparison without comparing every pair.
+    """
+    threshold = NAME_SIMILARITY_THRESHOLD if threshold is None else threshold
+
+    forms = {}
+    for value in values:
+        forms.setdefault(normalise_name(value), []).append(value)
+    names = list(forms)
+    if len(names) == 1:
+        return {value: values[0] for value in values}
+    grams = [name_trigrams(name) for name in names]
+    numbers = [name_numbers(name) for name in names]
+
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Dice >= t needs a trigram overlap of at least jaccard * |A| with jaccard = t / (2 - t)
+    jaccard = threshold / (2 - threshold)
+    frequency = Counter(gram for name_grams in grams for gram in name_grams)
+    index = {}
+    for i, name_grams in enumerate(grams):
+        ordered = sorted(name_grams, key=lambda gram: (frequency[gram], gram))
+        prefix = ordered[:len(ordered) - math.ceil(jaccard * len(ordered) - 1e-9) + 1]
+        candidates = set()
+        for gram in prefix:
+            candidates.update(index.get(gram, ()))
+        # Sizes too far apart cannot reach the threshold
+        min_size, max_size = jaccard * len(name_grams) - 1e-9, len(name_grams) / jaccard + 1e-9
+        for j in candidates:
+            if not min_size <= len(grams[j]) <= max_size:
+                continue
+            if numbers[i] == numbers[j] and find(i) != find(j) and dice(name_grams, grams[j]) >= threshold:
+                root_i, root_j = find(i), find(j)
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        for gram in prefix:
+            index.setdefault(gram, []).append(i)
+
+    labels = {}
+    for i, name in enumerate(names):
+        label = forms[names[find(i)]][0]
+        for value in forms[name]:
+            labels[value] = label
+    return labels
@@ -1,7 +1,48 @@
-from fastapi import FastAPI, Query
-import requests
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import List
+import asyncio
+import json
+import os
+import random
+import time
+import httpx
+from instrumentation import inc, install_metrics, observe, record_error, stage_timer
+from lookup_cache import cache_from_env, make_cache_key
+
+GLEIF_BASE_URL = os.environ.get("GLEIF_BASE_URL", "https://api.gleif.org/api/v1/lei-records")
+# GLEIF caps page[size] at 200
+GLEIF_PAGE_SIZE = int(os.environ.get("GLEIF_PAGE_SIZE", "200"))
+# Pages fetched at once after the first, and pooled keep-alive connections
+GLEIF_MAX_CONCURRENCY = int(os.environ.get("GLEIF_MAX_CONCURRENCY", "4"))
+GLEIF_TIMEOUT = float(os.environ.get("GLEIF_TIMEOUT", "30"))
+GLEIF_MAX_RETRIES = int(os.environ.get("GLEIF_MAX_RETRIES", "4"))
+# Upper bound on pages fetched per query; anything beyond is reported, not fetched
+GLEIF_MAX_PAGES = int(os.environ.get("GLEIF_MAX_PAGES", "50"))
+# Bulk lookups: identifiers packed into one multi-value filter, upstream lookups
+# in flight at once, and queries accepted per request
+GLEIF_BULK_BATCH_SIZE = int(os.environ.get("GLEIF_BULK_BATCH_SIZE", "100"))
+GLEIF_BULK_FANOUT = int(os.environ.get("GLEIF_BULK_FANOUT", "8"))
+GLEIF_BULK_MAX_QUERIES = int(os.environ.get("GLEIF_BULK_MAX_QUERIES", "10000"))
+# "api" queries api.gleif.org; "golden_copy" queries the local index built by lei_golden_copy.py
+LEI_BACKEND = os.environ.get("LEI_BACKEND", "api")
+LEI_GOLDEN_COPY_DB = os.environ.get("LEI_GOLDEN_COPY_DB", "gleif_golden_copy.sqlite")
+# Upper bound on golden-copy records per query; anything beyond is reported, not returned
+LEI_GOLDEN_COPY_MAX_RESULTS = int(os.environ.get("LEI_GOLDEN_COPY_MAX_RESULTS", "1000"))
+GLEIF_BACKOFF = float(os.environ.get("GLEIF_BACKOFF", "0.5"))
+GLEIF_MAX_BACKOFF = float(os.environ.get("GLEIF_MAX_BACKOFF", "30"))
+
+# Returned instead of fetching every LEI record when a query has no filters
+UNFILTERED_QUERY_ERROR = "At least one of legal_name, city, postal_code, lei or registered_as is required."
+
+_client = None
+_golden_copy = None
 
 app = FastAPI()
+# LEI_CACHE_SIZE / LEI_CACHE_TTL / LEI_CACHE_DB
+lookup_cache = cache_from_env("LEI")
+install_metrics(app, "lei", cache_stats=lambda: lookup_cache.stats)
 
 def clean_empty_values(data):
     """Recursively removes keys with empty strings, empty lists, or dictionaries with empty values from a dictionary."""
@@ -13,101 +54,456 @@ def clean_empty_values(data):
     else:
         return data
 
-def get_lei_records(legal_name="", city="", postal_code=""):
-    base_url = "https://api.gleif.org/api/v1/lei-records"
+# Values dropped from mapped records, as in clean_empty_values
+_EMPTY_VALUES = ("", [], {}, [{}])
+
+_ADDRESS_FIELDS = (
+    ("lang", "language", None),
+    ("FirstAddressLine", "addressLines", None),
+    ("City", "city", None),
+    ("Country", "country", None),
+    ("PostalCode", "postalCode", None),
+)
+
+# (output key, source key, nested fields or None for a plain value)
+_ENTITY_FIELDS = (
+    ("LegalName", "legalName", (("name", "name", None), ("language", "language", None))),
+    ("OtherEntityNames", "otherEntityNames", (("OtherEntityName", "OtherEntityName", None),)),
+    ("LegalAddress", "legalAddress", _ADDRESS_FIELDS),
+    ("HeadquartersAddress", "headquartersAddress", _ADDRESS_FIELDS),
+    ("OtherAddresses", "otherAddresses", (("OtherAddress", "OtherAddress", None),)),
+    ("RegistrationAuthority", "registrationAuthority", (
+        ("RegistrationAuthorityID", "RegistrationAuthorityID", None),
+        ("RegistrationAuthorityEntityID", "RegistrationAuthorityEntityID", None),
+    )),
+    ("LegalJurisdiction", "legalJurisdiction", None),
+    ("EntityCategory", "entityCategory", None),
+    ("LegalForm", "legalForm", (("EntityLegalFormCode", "EntityLegalFormCode", None),)),
+    ("EntityStatus", "entityStatus", None),
+    ("EntityCreationDate", "entityCreationDate", None),
+)
+
+_REGISTRATION_FIELDS = (
+    ("InitialRegistrationDate", "initialRegistrationDate", None),
+    ("LastUpdateDate", "lastUpdateDate", None),
+    ("RegistrationStatus", "registrationStatus", None),
+    ("NextRenewalDate", "nextRenewalDate", None),
+    ("ManagingLOU", "managingLou", None),
+    ("ValidationSources", "validationSources", None),
+    ("ValidationAuthority", "validationAuthority", (
+        ("ValidationAuthorityID", "ValidationAuthorityID", None),
+        ("ValidationAuthorityEntityID", "ValidationAuthorityEntityID", None),
+    )),
+)
+
+
+def _map_fields(source, fields):
+    # Builds the cleaned mapping directly: empty values are never inserted
+    mapped = {}
+    for out_key, source_key, nested in fields:
+        if nested is None:
+            value = source.get(source_key, "")
+            if type(value) is str:
+                if not value:
+                    continue
+            elif isinstance(value, (dict, list)):
+                value = clean_empty_values(value)
+                if value in _EMPTY_VALUES:
+                    continue
+        else:
+            value = source.get(source_key)
+            if not isinstance(value, dict):
+                continue
+            value = _map_fields(value, nested)
+            if not value:
+                continue
+        mapped[out_key] = value
+    return mapped
+
+
+def map_lei_record(record):
+    attributes = record.get('attributes') or {}
+    entity = attributes.get('entity')
+    registration = attributes.get('registration')
+
+    mapped_record = _map_fields(record, (("_id", "id", None),))
+    mapped_record.update(_map_fields(attributes, (("LEI", "lei", None),)))
+    if isinstance(entity, dict):
+        mapped_entity = _map_fields(entity, _ENTITY_FIELDS)
+        if mapped_entity:
+            mapped_record["Entity"] = mapped_entity
+    if isinstance(registration, dict):
+        mapped_registration = _map_fields(registration, _REGISTRATION_FIELDS)
+        if mapped_registration:
+            mapped_record["Registration"] = mapped_registration
+    return mapped_record
+
+
+class LeiUpstreamError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Error: {status_code}")
+        self.status_code = status_code
+
+
+def _get_client():
+    global _client
+    if _client is None or _client.is_closed:
+        # No pool timeout: bulk fan-out queues for a connection instead of failing
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GLEIF_TIMEOUT, pool=None),
+            headers={"Accept": "application/vnd.api+json"},
+            limits=httpx.Limits(max_connections=GLEIF_MAX_CONCURRENCY,
+                                max_keepalive_connections=GLEIF_MAX_CONCURRENCY),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), GLEIF_MAX_BACKOFF)
+        except ValueError:
+            pass
+    return min(GLEIF_BACKOFF * (2 ** attempt), GLEIF_MAX_BACKOFF) * (0.5 + random.random() / 2)
+
+
+async def fetch_lei_page(params, page_number, page_size=None):
+    # One page of raw GLEIF JSON; backs off on 429, 5xx and connection errors
+    client = _get_client()
+    params = dict(params, **{"page[number]": page_number, "page[size]": page_size or GLEIF_PAGE_SIZE})
+    for attempt in range(GLEIF_MAX_RETRIES + 1):
+        response = None
+        start = time.perf_counter()
+        try:
+            response = await client.get(GLEIF_BASE_URL, params=params)
+            observe("upstream_request_seconds", time.perf_counter() - start,
+                    upstream="gleif", status=str(response.status_code))
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code != 429 and response.status_code < 500:
+                raise LeiUpstreamError(response.status_code)
+        except httpx.TransportError as e:
+            observe("upstream_request_seconds", time.perf_counter() - start,
+                    upstream="gleif", status=type(e).__name__)
+            record_error("fetch_lei_page", e)
+            if attempt == GLEIF_MAX_RETRIES:
+                raise LeiUpstreamError(type(e).__name__)
+        if attempt < GLEIF_MAX_RETRIES:
+            inc("upstream_retries_total", upstream="gleif")
+            await asyncio.sleep(_retry_delay(response, attempt))
+    raise LeiUpstreamError(response.status_code if response is not None else "no response")
+
+
+def lei_filter_params(legal_name="", city="", postal_code="", lei="", registered_as=""):
     params = {
         "filter[entity.legalName]": legal_name,
         "filter[entity.addresses.city]": city,
         "filter[entity.addresses.postalCode]": postal_code,
-        "page[number]": 1,
-        "page[size]": 50
+        "filter[lei]": lei,
+        "filter[entity.registeredAs]": registered_as,
     }
-    params = {key: value for key, value in params.items() if value}
-    response = requests.get(base_url, params=params)
-    
-    if response.status_code == 200:
-        records = response.json().get('data', [])
-        mapped_records = []
-        for record in records:
-            attributes = record.get('attributes', {})
-            entity = attributes.get('entity', {})
-            registration = attributes.get('registration', {})
-
-            other_entity_names = entity.get('otherEntityNames', {})
-            other_entity_names_list = other_entity_names.get('OtherEntityName', [""]) if isinstance(other_entity_names, dict) else [""]
-
-            other_addresses = entity.get('otherAddresses', {})
-            other_addresses_list = other_addresses.get('OtherAddress', [{"type": "", "lang": "", "FirstAddressLine": "", "City": "", "Country": "", "PostalCode": ""}]) if isinstance(other_addresses, dict) else [{"type": "", "lang": "", "FirstAddressLine": "", "City": "", "Country": "", "PostalCode": ""}]
-
-            # Structured legal name
-            legal_name_data = entity.get("legalName", {})
-            legal_name_structured = {
-                "name": legal_name_data.get("name", ""),
-                "language": legal_name_data.get("language", "")
-            }
-
-            mapped_record = {
-                "_id": record.get("id", ""),
-                "LEI": attributes.get("lei", ""),
-                "Entity": {
-                    "LegalName": legal_name_structured,
-                    "OtherEntityNames": {
-                        "OtherEntityName": other_entity_names_list
-                    },
-                    "LegalAddress": {
-                        "lang": entity.get('legalAddress', {}).get("language", ""),
-                        "FirstAddressLine": entity.get('legalAddress', {}).get("addressLines", ""),
-                        "City": entity.get('legalAddress', {}).get("city", ""),
-                        "Country": entity.get('legalAddress', {}).get("country", ""),
-                        "PostalCode": entity.get('legalAddress', {}).get("postalCode", "")
-                    },
-                    "HeadquartersAddress": {
-                        "lang": entity.get('headquartersAddress', {}).get("language", ""),
-                        "FirstAddressLine": entity.get('headquartersAddress', {}).get("addressLines", ""),
-                        "City": entity.get('headquartersAddress', {}).get("city", ""),
-                        "Country": entity.get('headquartersAddress', {}).get("country", ""),
-                        "PostalCode": entity.get('headquartersAddress', {}).get("postalCode", "")
-                    },
-                    "OtherAddresses": {
-                        "OtherAddress": other_addresses_list
-                    },
-                    "RegistrationAuthority": {
-                        "RegistrationAuthorityID": entity.get("registrationAuthority", {}).get("RegistrationAuthorityID", ""),
-                        "RegistrationAuthorityEntityID": entity.get("registrationAuthority", {}).get("RegistrationAuthorityEntityID", "")
-                    },
-                    "LegalJurisdiction": entity.get("legalJurisdiction", ""),
-                    "EntityCategory": entity.get("entityCategory", ""),
-                    "LegalForm": {
-                        "EntityLegalFormCode": entity.get("legalForm", {}).get("EntityLegalFormCode", "")
-                    },
-                    "EntityStatus": entity.get("entityStatus", ""),
-                    "EntityCreationDate": entity.get("entityCreationDate", "")
-                },
-                "Registration": {
-                    "InitialRegistrationDate": registration.get("initialRegistrationDate", ""),
-                    "LastUpdateDate": registration.get("lastUpdateDate", ""),
-                    "RegistrationStatus": registration.get("registrationStatus", ""),
-                    "NextRenewalDate": registration.get("nextRenewalDate", ""),
-                    "ManagingLOU": registration.get("managingLou", ""),
-                    "ValidationSources": registration.get("validationSources", ""),
-                    "ValidationAuthority": {
-                        "ValidationAuthorityID": registration.get("validationAuthority", {}).get("ValidationAuthorityID", ""),
-                        "ValidationAuthorityEntityID": registration.get("validationAuthority", {}).get("ValidationAuthorityEntityID", "")
-                    }
-                }
-            }
-
-            # Clean up empty values in the mapped record
-            cleaned_record = clean_empty_values(mapped_record)
-            mapped_records.append(cleaned_record)
-
-        return mapped_records
-    else:
-        return {"error": f"Error: {response.status_code}"}
+    return {key: value for key, value in params.items() if value}
+
+
+def _get_golden_copy():
+    global _golden_copy
+    if _golden_copy is None:
+        from lei_golden_copy import GoldenCopyIndex
+        _golden_copy = GoldenCopyIndex(LEI_GOLDEN_COPY_DB, read_only=True)
+    return _golden_copy
+
+
+async def iter_raw_lei_pages(params, truncation=None):
+    # Yields (page_number, raw_records) as pages arrive: page 1 first, the rest
+    # fetched concurrently once page 1 reports how many pages there are.
+    # When a cap cuts the results short, truncation (if given) is filled in with
+    # {"limit": records returned at most, "total": records upstream or None}
+    if LEI_BACKEND == "golden_copy":
+        with stage_timer("golden_copy_search"):
+            records = await asyncio.to_thread(_get_golden_copy().search, params,
+                                              LEI_GOLDEN_COPY_MAX_RESULTS, truncation)
+        yield 1, records
+        return
+
+    first_page = await fetch_lei_page(params, 1)
+    yield 1, first_page.get('data', [])
+
+    pagination = first_page.get('meta', {}).get('pagination', {})
+    last_page = pagination.get('lastPage', 1) or 1
+    if last_page > GLEIF_MAX_PAGES:
+        print(f"GLEIF query {params} has {last_page} pages, fetching only the first {GLEIF_MAX_PAGES}")
+        last_page = GLEIF_MAX_PAGES
+        if truncation is not None:
+            truncation.update(limit=GLEIF_MAX_PAGES * GLEIF_PAGE_SIZE, total=pagination.get('total'))
+    if last_page <= 1:
+        return
+
+    semaphore = asyncio.Semaphore(GLEIF_MAX_CONCURRENCY)
+
+    async def fetch(page_number):
+        async with semaphore:
+            page = await fetch_lei_page(params, page_number)
+        return page_number, page.get('data', [])
+
+    tasks = [asyncio.ensure_future(fetch(page_number)) for page_number in range(2, last_page + 1)]
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            yield await next_page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def iter_lei_record_pages(legal_name="", city="", postal_code="", lei="", registered_as="", truncation=None):
+    params = lei_filter_params(legal_name, city, postal_code, lei, registered_as)
+    async for page_number, records in iter_raw_lei_pages(params, truncation):
+        with stage_timer("map_lei_records"):
+            mapped = [map_lei_record(record) for record in records]
+        yield page_number, mapped
+
+
+async def get_lei_records(legal_name="", city="", postal_code="", lei="", registered_as="", truncation=None):
+    if not lei_filter_params(legal_name, city, postal_code, lei, registered_as):
+        return {"error": UNFILTERED_QUERY_ERROR}
+    pages = {}
+    try:
+        async for page_number, records in iter_lei_record_pages(legal_name, city, postal_code, lei, registered_as,
+                                                                truncation):
+            pages[page_number] = records
+    except LeiUpstreamError as e:
+        record_error("get_lei_records", e)
+        return {"error": str(e)}
+    return [record for page_number in sorted(pages) for record in pages[page_number]]
+
+
+class LeiQuery(BaseModel):
+    legal_name: str = ""
+    city: str = ""
+    postal_code: str = ""
+    lei: str = ""
+    registered_as: str = ""
+
+
+async def _cached_lookup(**query):
+    # Shared by GET /lei-records/ and bulk lookups. Returns {"data": [...]} plus
+    # "truncated" when a cap cut the results short, or {"error": ...}, which is not cached
+    async def compute():
+        truncation = {}
+        records = await get_lei_records(**query, truncation=truncation)
+        if not isinstance(records, list):
+            return records
+        result = {"data": records}
+        if truncation:
+            result["truncated"] = truncation
+        return result
+
+    result = await lookup_cache.aget_or_compute(make_cache_key("lei", **query), compute,
+                                                should_cache=lambda result: "error" not in result)
+    # Entries written before the truncation marker are plain record lists
+    return {"data": result} if isinstance(result, list) else result
+
+
+async def _lookup_single(query):
+    return await _cached_lookup(**query.model_dump())
+
+
+async def _lookup_batch(filter_name, attribute, identifiers):
+    # One multi-value filter request (plus its extra pages) for many identifiers.
+    # identifiers maps each normalised identifier to the spelling sent upstream;
+    # returns ({normalised identifier: [mapped records]}, truncation or {})
+    params = {filter_name: ",".join(identifiers.values())}
+    found = {identifier: [] for identifier in identifiers}
+    pages = {}
+    truncation = {}
+    async for page_number, records in iter_raw_lei_pages(params, truncation):
+        pages[page_number] = records
+    for page_number in sorted(pages):
+        for record in pages[page_number]:
+            value = attribute(record)
+            if value in found:
+                found[value].append(map_lei_record(record))
+    return found, truncation
+
+
+def _normalise_identifier(value):
+    # Case and whitespace differences between a query and GLEIF's copy still match
+    return " ".join(str(value or "").split()).upper()
+
+
+def _record_lei(record):
+    return _normalise_identifier(record.get('attributes', {}).get('lei'))
+
+
+def _record_registered_as(record):
+    return _normalise_identifier(record.get('attributes', {}).get('entity', {}).get('registeredAs'))
+
+
+async def bulk_lei_lookup(queries):
+    # Yields (index, result) per query as results arrive, where result is
+    # {"data": [...]} (plus "truncated" when a cap cut it short) or {"error": ...}.
+    # Queries that only carry an LEI or a registration ID are packed into
+    # multi-value filter requests; everything else runs as individual lookups.
+    # At most GLEIF_BULK_FANOUT upstream lookups run at once. A lookup that fails
+    # gives {"error": ...} for its queries rather than ending the stream.
+    by_lei, by_registered_as, singles, unfiltered = {}, {}, [], []
+    spellings = {}
+    for index, query in enumerate(queries):
+        others = query.legal_name or query.city or query.postal_code
+        if not lei_filter_params(**query.model_dump()):
+            unfiltered.append(index)
+        elif query.lei and not others and not query.registered_as:
+            identifier = _normalise_identifier(query.lei)
+            by_lei.setdefault(identifier, []).append(index)
+            spellings.setdefault(("filter[lei]", identifier), identifier)
+        elif query.registered_as and not others and not query.lei:
+            identifier = _normalise_identifier(query.registered_as)
+            by_registered_as.setdefault(identifier, []).append(index)
+            # Registration IDs go upstream as first written; only the matching is normalised
+            spellings.setdefault(("filter[entity.registeredAs]", identifier), query.registered_as.strip())
+        else:
+            singles.append(index)
+
+    semaphore = asyncio.Semaphore(GLEIF_BULK_FANOUT)
+
+    async def run_batch(filter_name, attribute, groups, identifiers):
+        try:
+            async with semaphore:
+                found, truncation = await _lookup_batch(
+                    filter_name, attribute, {identifier: spellings[filter_name, identifier] for identifier in identifiers})
+        except Exception as e:
+            record_error("bulk_lei_lookup", e)
+            error = {"error": str(e) if isinstance(e, LeiUpstreamError) else f"Error: {type(e).__name__}"}
+            return [(index, error) for identifier in identifiers for index in groups[identifier]]
+        results = []
+        for identifier in identifiers:
+            result = {"data": found[identifier]}
+            if truncation:
+                result["truncated"] = truncation
+            results.extend((index, result) for index in groups[identifier])
+        return results
+
+    async def run_single(index):
+        try:
+            async with semaphore:
+                return [(index, await _lookup_single(queries[index]))]
+        except Exception as e:
+            record_error("bulk_lei_lookup", e)
+            return [(index, {"error": f"Error: {type(e).__name__}"})]
+
+    jobs = []
+    for filter_name, attribute, groups in (("filter[lei]", _record_lei, by_lei),
+                                           ("filter[entity.registeredAs]", _record_registered_as, by_registered_as)):
+        identifiers = list(groups)
+        for start in range(0, len(identifiers), GLEIF_BULK_BATCH_SIZE):
+            jobs.append(run_batch(filter_name, attribute, groups, identifiers[start:start + GLEIF_BULK_BATCH_SIZE]))
+    jobs.extend(run_single(index) for index in singles)
+
+    for index in unfiltered:
+        yield index, {"error": UNFILTERED_QUERY_ERROR}
+
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    try:
+        for next_job in asyncio.as_completed(tasks):
+            for index, result in await next_job:
+                yield index, result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@app.on_event("startup")
+async def open_golden_copy():
+    # A missing or empty index stops the service here instead of answering every lookup with []
+    if LEI_BACKEND == "golden_copy":
+        _get_golden_copy()
+
+
+@app.on_event("shutdown")
+async def shutdown_client():
+    await close_client()
+
+
+async def _stream_lei_records(legal_name, city, postal_code):
+    # Record lines, then a {"truncated": ...} trailer line when a cap cut the results short
+    truncation = {}
+    try:
+        async for _, records in iter_lei_record_pages(legal_name, city, postal_code, truncation=truncation):
+            for record in records:
+                yield json.dumps(record) + "\n"
+    except LeiUpstreamError as e:
+        record_error("stream_lei_records", e)
+        yield json.dumps({"error": str(e)}) + "\n"
+        return
+    if truncation:
+        yield json.dumps({"truncated": truncation}) + "\n"
+
+
+def _truncation_headers(truncation):
+    headers = {"X-Results-Truncated": "true", "X-Results-Limit": str(truncation["limit"])}
+    if truncation.get("total") is not None:
+        headers["X-Results-Total"] = str(truncation["total"])
+    return headers
+
 
 @app.get("/lei-records/")
-def lei_records(
+async def lei_records(
     legal_name: str = Query(default="", title="Legal Name"), 
     city: str = Query(default="", title="City"), 
+    postal_code: str = Query(default="", title="Postal Code"),
+    stream: bool = Query(default=False, title="Stream NDJSON as pages arrive")):
+    # Without a filter the upstream query would page through every LEI record
+    if not (legal_name or city or postal_code):
+        raise HTTPException(status_code=400, detail=UNFILTERED_QUERY_ERROR)
+    if stream:
+        return StreamingResponse(_stream_lei_records(legal_name, city, postal_code),
+                                 media_type="application/x-ndjson")
+
+    # Upstream errors come back as {"error": ...}; capped results carry X-Results-* headers
+    result = await _cached_lookup(legal_name=legal_name, city=city, postal_code=postal_code)
+    if "error" in result:
+        return result
+    headers = _truncation_headers(result["truncated"]) if "truncated" in result else None
+    return JSONResponse(result["data"], headers=headers)
+
+
+async def _stream_bulk_results(queries):
+    async for index, result in bulk_lei_lookup(queries):
+        line = {"index": index, "query": queries[index].model_dump(exclude_defaults=True)}
+        line.update(result)
+        yield json.dumps(line) + "\n"
+
+
+@app.post("/lei-records/bulk")
+async def lei_records_bulk(queries: List[LeiQuery]):
+    # NDJSON, one line per query in completion order; "index" ties it to the input
+    if len(queries) > GLEIF_BULK_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {GLEIF_BULK_MAX_QUERIES} queries per request.")
+    return StreamingResponse(_stream_bulk_results(queries), media_type="application/x-ndjson")
+
+
+@app.get("/admin/cache")
+def cache_stats():
+    return lookup_cache.snapshot_stats()
+
+
+@app.delete("/admin/cache")
+def invalidate_cache(
+    legal_name: str = Query(default="", title="Legal Name"),
+    city: str = Query(default="", title="City"),
     postal_code: str = Query(default="", title="Postal Code")):
-    return get_lei_records(legal_name, city, postal_code)
+    # Drops the entry for one lookup, or every LEI entry when no parameters are given
+    if legal_name or city or postal_code:
+        key = make_cache_key("lei", legal_name=legal_name, city=city, postal_code=postal_code)
+        removed = lookup_cache.invalidate(key=key)
+    else:
+        removed = lookup_cache.invalidate(prefix="lei:")
+    return {"removed": removed}
+
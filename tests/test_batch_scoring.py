@@ -0,0 +1,60 @@
+"""set_dynamic_probability_batch must score every payload exactly as the per-record path does."""
+import pytest
+
+import composits
+from synthetic import PayloadGenerator, write_postcode_csv
+
+
+@pytest.fixture(scope="module", autouse=True)
+def postcode_store(tmp_path_factory):
+    csv_path = tmp_path_factory.mktemp("postcodes") / "postcodes.csv"
+    postcodes = write_postcode_csv(str(csv_path), postcodes=400, rows=1200)
+    previous = composits.csv_file_path, composits.postcode_cache_path
+    composits.configure_postcode_store(csv_path=str(csv_path), cache_path="")
+    yield postcodes
+    composits.configure_postcode_store(*previous)
+
+
+@pytest.fixture(params=[True, False], ids=["fuzzy", "exact"])
+def fuzzy(request, monkeypatch):
+    monkeypatch.setattr(composits, "FUZZY_NAME_MATCHING", request.param)
+    return request.param
+
+
+def payloads(postcodes, count=300, seed=7, **settings):
+    return PayloadGenerator(seed=seed, postcodes=postcodes, **settings).payloads(count)
+
+
+def ordered(results):
+    # Key order is part of the output contract, so compare item lists rather than dicts
+    return [list(result.items()) for result in results]
+
+
+def test_batch_matches_per_record(postcode_store, fuzzy):
+    batch = payloads(postcode_store)
+    expected = [composits.set_dynamic_probability(composits.extract_keys_from_sources(payload))
+                for payload in batch]
+    assert ordered(composits.set_dynamic_probability_batch(batch)) == ordered(expected)
+
+
+def test_batch_matches_process_json_input(postcode_store, fuzzy):
+    batch = payloads(postcode_store, seed=11, sources=7, list_length=(0, 8), name_variants=5)
+    expected = [composits.process_json_input(payload) for payload in batch]
+    assert ordered(composits.set_dynamic_probability_batch(batch)) == ordered(expected)
+
+
+def test_batch_handles_empty_and_sparse_payloads(postcode_store, fuzzy):
+    batch = [{}, {"combinedResults": {}}, {"combinedResults": {"leiData": [], "abrData": {}}}]
+    batch += payloads(postcode_store, count=5, sources=2, list_length=(0, 0))
+    expected = [composits.process_json_input(payload) for payload in batch]
+    assert ordered(composits.set_dynamic_probability_batch(batch)) == ordered(expected)
+    assert composits.set_dynamic_probability_batch([]) == []
+
+
+def test_fuzzy_setting_changes_scores(postcode_store, monkeypatch):
+    # Guards the parametrisation: the two modes must actually score names differently
+    batch = payloads(postcode_store, count=50, name_variants=4)
+    monkeypatch.setattr(composits, "FUZZY_NAME_MATCHING", True)
+    with_fuzzy = composits.set_dynamic_probability_batch(batch)
+    monkeypatch.setattr(composits, "FUZZY_NAME_MATCHING", False)
+    assert composits.set_dynamic_probability_batch(batch) != with_fuzzy
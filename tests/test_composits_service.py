@@ -0,0 +1,70 @@
+"""Request handling of the composite scoring service."""
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+# The tests do not need the postcode index built at import
+os.environ.setdefault("COMPOSITS_PRELOAD_POSTCODES", "0")
+import composits_service  # noqa: E402
+
+PAYLOAD = {"combinedResults": {"abrData": {"Business Name": "KBBK SOLUTIONS", "Postcode": "4000"}}}
+
+
+def post(url, content, headers=None):
+    async def run():
+        transport = httpx.ASGITransport(app=composits_service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(url, content=content, headers=headers)
+    return asyncio.run(run())
+
+
+def chunked(body, size=16):
+    # No Content-Length, so only the running cap can stop it
+    async def chunks():
+        for start in range(0, len(body), size):
+            yield body[start:start + size]
+    return chunks()
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    monkeypatch.setattr(composits_service, "MAX_BODY_BYTES", 64)
+
+
+@pytest.mark.parametrize("url", ["/score", "/score/batch"])
+def test_rejects_oversized_content_length(small_limit, url):
+    response = post(url, b"x" * 65)
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize("url", ["/score", "/score/batch"])
+def test_rejects_oversized_chunked_body(small_limit, url):
+    response = post(url, chunked(b"x" * 200))
+    assert response.status_code == 413
+
+
+def test_accepts_chunked_body_under_the_limit():
+    response = post("/score", chunked(json.dumps(PAYLOAD).encode()))
+    assert response.status_code == 200
+    assert isinstance(response.json(), dict)
+
+
+@pytest.mark.parametrize("body", [json.dumps(json.dumps(PAYLOAD)), "[]", "42", "null"])
+def test_score_rejects_non_object_payload(body):
+    response = post("/score", body.encode())
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Payload must be a JSON object."}
+
+
+def test_batch_marks_non_object_lines():
+    body = "\n".join([json.dumps(PAYLOAD), json.dumps(json.dumps(PAYLOAD)), "[1]", "{oops", json.dumps(PAYLOAD)])
+    lines = [json.loads(line) for line in post("/score/batch", body.encode()).text.splitlines()]
+
+    assert len(lines) == 5
+    assert lines[0] == lines[4]
+    assert "error" not in lines[0]
+    assert lines[1] == lines[2] == {"error": "Payload must be a JSON object."}
+    assert lines[3]["error"].startswith("Invalid JSON")
@@ -0,0 +1,43 @@
+"""Candidate scoring in the entity blocking index."""
+import pytest
+
+from entity_index import EntityIndex, blocking_keys
+
+
+def record(name, postcode="4380", abn=None):
+    extracted = {"Entity Name": [{"value": name, "source": "abrData"}],
+                 "Postal code": [{"value": postcode, "source": "abrData"}]}
+    if abn:
+        extracted["ABN"] = [{"value": abn, "source": "abrData"}]
+    return extracted
+
+
+@pytest.mark.parametrize("first, second", [
+    ("KBBK SOLUTIONS", "KBBK SOLUTIONS PTY LTD"),
+    ("GRANITE BELT ADVISORY", "Granite Belt Advisory Pty Ltd"),
+])
+def test_legal_form_does_not_hide_a_duplicate_in_either_order(first, second):
+    for existing, added in ((first, second), (second, first)):
+        index = EntityIndex()
+        index.add("a", record(existing))
+        found = index.add("b", record(added))
+        assert [c["entity_id"] for c in found] == ["a"]
+        assert found[0]["score"] == 0.9
+        index.close()
+
+
+def test_legal_forms_are_not_blocking_keys():
+    assert {token for field, token in blocking_keys(record("KBBK Pty. Ltd.")) if field == "name"} == {"KBBK"}
+
+
+def test_one_shared_word_is_not_a_match():
+    index = EntityIndex()
+    index.add("a", record("KBBK SOLUTIONS"))
+    assert index.add("b", record("ACME SOLUTIONS")) == []
+
+
+def test_shared_abn_matches_on_its_own():
+    index = EntityIndex()
+    index.add("a", record("KBBK SOLUTIONS", abn="58 453 256 019"))
+    found = index.add("b", record("BY ALL ACCOUNTS BOOKKEEPING", postcode="2000", abn="58453256019"))
+    assert found[0]["entity_id"] == "a" and found[0]["matched"] == ["abn"]
@@ -0,0 +1,92 @@
+"""EntityScorer must track process_json_input as single sources change."""
+import json
+import random
+
+import pytest
+
+import composits
+from bench_incremental_scoring import entity_payload, random_delta, record
+
+
+@pytest.fixture(params=[True, False], ids=["fuzzy", "exact"])
+def fuzzy(request, monkeypatch):
+    monkeypatch.setattr(composits, "FUZZY_NAME_MATCHING", request.param)
+    return request.param
+
+
+def payload():
+    return entity_payload(random.Random(3), records=3)
+
+
+def assert_current(scorer):
+    expected = composits.process_json_input(scorer.payload())
+    assert list(scorer.result().items()) == list(expected.items())
+
+
+def test_random_deltas_match_full_recompute(fuzzy):
+    rng = random.Random(11)
+    for _ in range(10):
+        scorer = composits.EntityScorer(entity_payload(rng, records=3))
+        for _ in range(10):
+            scorer.apply(random_delta(rng, scorer))
+            assert_current(scorer)
+
+
+def test_accepts_json_text_and_bytes():
+    expected = composits.EntityScorer(payload()).result()
+    text = json.dumps(payload())
+    assert composits.EntityScorer(text).result() == expected
+    assert composits.EntityScorer(text.encode()).result() == expected
+
+
+def test_add_appends_to_list_source_and_new_sources_go_last():
+    scorer = composits.EntityScorer(payload())
+    sources = list(scorer.payload()["combinedResults"])
+    before = list(scorer.payload()["combinedResults"]["xeroData"])
+    added = record(random.Random(5))
+
+    scorer.add_source("xeroData", added)
+    scorer.add_source("extraData", [added])
+
+    combined = scorer.payload()["combinedResults"]
+    assert combined["xeroData"] == before + [added]
+    assert list(combined) == sources + ["extraData"]
+    assert_current(scorer)
+
+
+def test_replace_keeps_source_position():
+    scorer = composits.EntityScorer(payload())
+    sources = list(scorer.payload()["combinedResults"])
+    replacement = [record(random.Random(9))]
+
+    scorer.replace_source(sources[0], replacement)
+
+    combined = scorer.payload()["combinedResults"]
+    assert list(combined) == sources
+    assert combined[sources[0]] == replacement
+    assert_current(scorer)
+
+
+def test_remove_source():
+    scorer = composits.EntityScorer(payload())
+    changed = scorer.remove_source("xeroData")
+
+    assert changed
+    assert "xeroData" not in scorer.payload()["combinedResults"]
+    assert_current(scorer)
+    assert scorer.remove_source("xeroData") == set()
+
+
+def test_none_data_is_rejected():
+    scorer = composits.EntityScorer(payload())
+    expected = scorer.payload()
+
+    with pytest.raises(ValueError):
+        scorer.add_source("xeroData", None)
+    with pytest.raises(ValueError):
+        scorer.replace_source("xeroData", None)
+    # apply reports the error and leaves the entity as it was
+    assert scorer.apply({"op": "replace", "source": "xeroData"}) == set()
+    assert scorer.apply({"op": "add", "source": "xeroData", "data": None}) == set()
+    assert scorer.payload() == expected
+    assert_current(scorer)
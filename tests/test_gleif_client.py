@@ -0,0 +1,150 @@
+"""The pooled GLEIF client against the local mock lei-records server."""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import real_time_scraper_LEI as lei
+from instrumentation import metrics
+from lookup_cache import LookupCache
+from mock_gleif import base_url, matches, start_mock_gleif
+
+CITY_FILTER = {"filter[entity.addresses.city]": "BRISBANE"}
+
+
+@pytest.fixture
+def gleif(monkeypatch):
+    servers = []
+
+    def start(**options):
+        server, state = start_mock_gleif(**options)
+        servers.append(server)
+        monkeypatch.setattr(lei, "GLEIF_BASE_URL", base_url(server))
+        return state
+
+    monkeypatch.setattr(lei, "LEI_BACKEND", "api")
+    monkeypatch.setattr(lei, "GLEIF_PAGE_SIZE", 20)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def call_service(method, url, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=lei.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        finally:
+            await lei.close_client()
+    return asyncio.run(run())
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def lookup(**query):
+    # Each test runs its own event loop, so the pooled client is closed with it
+    async def run():
+        try:
+            return await lei.get_lei_records(**query)
+        finally:
+            await lei.close_client()
+    return asyncio.run(run())
+
+
+def expected_leis(state, filters):
+    return [record["attributes"]["lei"] for record in state.records if matches(record, filters)]
+
+
+def test_fetches_every_page_in_order(gleif):
+    state = gleif(records=500)
+    records = lookup(city="brisbane")
+
+    assert [record["LEI"] for record in records] == expected_leis(state, CITY_FILTER)
+    # 100 matches at 20 per page
+    assert state.requests == 5
+
+
+def test_retries_429_after_retry_after(gleif, monkeypatch):
+    # Backoff alone would wait far longer than the test allows, so the wait must come from Retry-After
+    monkeypatch.setattr(lei, "GLEIF_BACKOFF", 30)
+    monkeypatch.setattr(lei, "GLEIF_MAX_BACKOFF", 60)
+    state = gleif(records=500, fail_every=2, retry_after="0.2")
+    metrics.reset()
+
+    start = time.perf_counter()
+    records = lookup(city="brisbane")
+    elapsed = time.perf_counter() - start
+
+    assert [record["LEI"] for record in records] == expected_leis(state, CITY_FILTER)
+    retries = state.requests - 5
+    assert retries > 0
+    assert 0.2 <= elapsed < 5
+    assert f'upstream_retries_total{{upstream="gleif"}} {retries}' in metrics.render()
+
+
+def test_caps_pages_with_a_warning(gleif, monkeypatch, capsys):
+    monkeypatch.setattr(lei, "GLEIF_MAX_PAGES", 2)
+    state = gleif(records=500)
+    records = lookup(city="brisbane")
+
+    assert [record["LEI"] for record in records] == expected_leis(state, CITY_FILTER)[:40]
+    assert state.requests == 2
+    assert "has 5 pages, fetching only the first 2" in capsys.readouterr().out
+
+
+def test_non_retryable_4xx_returns_error(gleif):
+    state = gleif(records=10, error_status=400)
+
+    assert lookup(city="brisbane") == {"error": "Error: 400"}
+    assert state.requests == 1
+
+
+def test_capped_results_are_marked(gleif, monkeypatch):
+    monkeypatch.setattr(lei, "GLEIF_MAX_PAGES", 2)
+    monkeypatch.setattr(lei, "lookup_cache", LookupCache())
+    gleif(records=500)
+    truncation = {}
+    lookup(city="brisbane", truncation=truncation)
+    assert truncation == {"limit": 40, "total": 100}
+
+    response = call_service("GET", "/lei-records/", params={"city": "brisbane"})
+    assert len(response.json()) == 40
+    assert response.headers["X-Results-Truncated"] == "true"
+    assert response.headers["X-Results-Total"] == "100"
+
+    lines = ndjson(call_service("GET", "/lei-records/", params={"city": "brisbane", "stream": "true"}))
+    assert len(lines) == 41
+    assert lines[-1] == {"truncated": {"limit": 40, "total": 100}}
+
+    lines = ndjson(call_service("POST", "/lei-records/bulk", json=[{"city": "brisbane"}]))
+    assert len(lines[0]["data"]) == 40
+    assert lines[0]["truncated"] == {"limit": 40, "total": 100}
+
+
+def test_complete_results_are_not_marked(gleif, monkeypatch):
+    monkeypatch.setattr(lei, "lookup_cache", LookupCache())
+    gleif(records=500)
+
+    response = call_service("GET", "/lei-records/", params={"city": "brisbane"})
+    assert len(response.json()) == 100
+    assert "X-Results-Truncated" not in response.headers
+    lines = ndjson(call_service("GET", "/lei-records/", params={"city": "brisbane", "stream": "true"}))
+    assert all("LEI" in line for line in lines)
+
+
+def test_unfiltered_queries_are_rejected(gleif, monkeypatch):
+    monkeypatch.setattr(lei, "lookup_cache", LookupCache())
+    state = gleif(records=500)
+
+    assert lookup() == {"error": lei.UNFILTERED_QUERY_ERROR}
+    assert call_service("GET", "/lei-records/").status_code == 400
+    assert call_service("GET", "/lei-records/", params={"stream": "true"}).status_code == 400
+    lines = ndjson(call_service("POST", "/lei-records/bulk", json=[{}]))
+    assert lines == [{"index": 0, "query": {}, "error": lei.UNFILTERED_QUERY_ERROR}]
+    assert state.requests == 0
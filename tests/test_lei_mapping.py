@@ -0,0 +1,156 @@
+"""map_lei_record must map every record exactly as the previous build-then-prune mapper did.
+
+The reference below is that mapper, kept verbatim; benchmarks/bench_lei_mapping.py
+times the two against each other.
+"""
+import copy
+import json
+import os
+import random
+
+import pytest
+
+from mock_gleif import synthetic_record
+from real_time_scraper_LEI import map_lei_record
+
+FIXTURE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "benchmarks", "fixtures", "gleif_lei_records_page.json")
+
+
+# Reference: previous implementation
+def legacy_clean_empty_values(data):
+    """Recursively removes keys with empty strings, empty lists, or dictionaries with empty values from a dictionary."""
+    if isinstance(data, dict):
+        return {k: v for k, v in ((k, legacy_clean_empty_values(v)) for k, v in data.items())
+                if v not in ("", [], {}, [{}])}
+    elif isinstance(data, list):
+        return [legacy_clean_empty_values(item) for item in data if item not in ("", [], {}, [{}])]
+    else:
+        return data
+
+
+def legacy_map_lei_record(record):
+    attributes = record.get('attributes', {})
+    entity = attributes.get('entity', {})
+    registration = attributes.get('registration', {})
+
+    other_entity_names = entity.get('otherEntityNames', {})
+    other_entity_names_list = other_entity_names.get('OtherEntityName', [""]) if isinstance(other_entity_names, dict) else [""]
+
+    other_addresses = entity.get('otherAddresses', {})
+    other_addresses_list = other_addresses.get('OtherAddress', [{"type": "", "lang": "", "FirstAddressLine": "", "City": "", "Country": "", "PostalCode": ""}]) if isinstance(other_addresses, dict) else [{"type": "", "lang": "", "FirstAddressLine": "", "City": "", "Country": "", "PostalCode": ""}]
+
+    # Structured legal name
+    legal_name_data = entity.get("legalName", {})
+    legal_name_structured = {
+        "name": legal_name_data.get("name", ""),
+        "language": legal_name_data.get("language", "")
+    }
+
+    mapped_record = {
+        "_id": record.get("id", ""),
+        "LEI": attributes.get("lei", ""),
+        "Entity": {
+            "LegalName": legal_name_structured,
+            "OtherEntityNames": {
+                "OtherEntityName": other_entity_names_list
+            },
+            "LegalAddress": {
+                "lang": entity.get('legalAddress', {}).get("language", ""),
+                "FirstAddressLine": entity.get('legalAddress', {}).get("addressLines", ""),
+                "City": entity.get('legalAddress', {}).get("city", ""),
+                "Country": entity.get('legalAddress', {}).get("country", ""),
+                "PostalCode": entity.get('legalAddress', {}).get("postalCode", "")
+            },
+            "HeadquartersAddress": {
+                "lang": entity.get('headquartersAddress', {}).get("language", ""),
+                "FirstAddressLine": entity.get('headquartersAddress', {}).get("addressLines", ""),
+                "City": entity.get('headquartersAddress', {}).get("city", ""),
+                "Country": entity.get('headquartersAddress', {}).get("country", ""),
+                "PostalCode": entity.get('headquartersAddress', {}).get("postalCode", "")
+            },
+            "OtherAddresses": {
+                "OtherAddress": other_addresses_list
+            },
+            "RegistrationAuthority": {
+                "RegistrationAuthorityID": entity.get("registrationAuthority", {}).get("RegistrationAuthorityID", ""),
+                "RegistrationAuthorityEntityID": entity.get("registrationAuthority", {}).get("RegistrationAuthorityEntityID", "")
+            },
+            "LegalJurisdiction": entity.get("legalJurisdiction", ""),
+            "EntityCategory": entity.get("entityCategory", ""),
+            "LegalForm": {
+                "EntityLegalFormCode": entity.get("legalForm", {}).get("EntityLegalFormCode", "")
+            },
+            "EntityStatus": entity.get("entityStatus", ""),
+            "EntityCreationDate": entity.get("entityCreationDate", "")
+        },
+        "Registration": {
+            "InitialRegistrationDate": registration.get("initialRegistrationDate", ""),
+            "LastUpdateDate": registration.get("lastUpdateDate", ""),
+            "RegistrationStatus": registration.get("registrationStatus", ""),
+            "NextRenewalDate": registration.get("nextRenewalDate", ""),
+            "ManagingLOU": registration.get("managingLou", ""),
+            "ValidationSources": registration.get("validationSources", ""),
+            "ValidationAuthority": {
+                "ValidationAuthorityID": registration.get("validationAuthority", {}).get("ValidationAuthorityID", ""),
+                "ValidationAuthorityEntityID": registration.get("validationAuthority", {}).get("ValidationAuthorityEntityID", "")
+            }
+        }
+    }
+
+    # Clean up empty values in the mapped record
+    return legacy_clean_empty_values(mapped_record)
+
+
+def varied_record(i, rng):
+    # Synthetic record with optional fields removed, blanked or reshaped
+    record = synthetic_record(i)
+    entity = record["attributes"]["entity"]
+    registration = record["attributes"]["registration"]
+    for container in (entity, registration, entity["legalAddress"], entity["headquartersAddress"]):
+        for key in list(container):
+            roll = rng.random()
+            if roll < 0.1:
+                del container[key]
+            elif roll < 0.2 and not isinstance(container[key], dict):
+                container[key] = ""
+    if rng.random() < 0.3:
+        entity["otherAddresses"] = {"OtherAddress": [
+            {"type": "ALTERNATIVE_LANGUAGE_LEGAL_ADDRESS", "lang": "", "City": "BRISBANE"},
+            {"type": "", "lang": ""},
+            {"type": "AUTO_ASCII_TRANSLITERATED_LEGAL_ADDRESS", "PostalCode": "4000"},
+        ]}
+    if rng.random() < 0.3:
+        entity["otherEntityNames"] = {"OtherEntityName": ["", f"ALIAS {i}", {}]}
+    if isinstance(entity.get("legalAddress"), dict) and rng.random() < 0.3:
+        entity["legalAddress"]["addressLines"] = ["", f"LEVEL {i % 9}", ""]
+    if rng.random() < 0.05:
+        record["attributes"]["entity"] = {}
+    return record
+
+
+def assert_same_mapping(record):
+    expected = legacy_map_lei_record(copy.deepcopy(record))
+    # Compared as JSON text, so key order counts too
+    assert json.dumps(map_lei_record(record)) == json.dumps(expected)
+
+
+@pytest.mark.parametrize("seed", [7, 8, 9])
+def test_varied_records_match_reference(seed):
+    rng = random.Random(seed)
+    for i in range(500):
+        assert_same_mapping(varied_record(i, rng))
+
+
+def test_fixture_page_matches_reference():
+    with open(FIXTURE_PAGE) as f:
+        page = json.load(f)
+    for record in page["data"]:
+        assert_same_mapping(record)
+
+
+def test_does_not_mutate_the_record():
+    record = varied_record(1, random.Random(1))
+    before = copy.deepcopy(record)
+    map_lei_record(record)
+    assert record == before
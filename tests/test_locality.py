@@ -0,0 +1,46 @@
+"""Locality candidates derived from source postcodes."""
+import json
+
+import pytest
+
+import composits
+
+POSTCODE_ROWS = """Pcode,Locality,State,Latitude,Longitude
+4380,AMIENS,QLD,-28.6,151.8
+4380,STANTHORPE,QLD,-28.65,151.93
+4380,AMIENS,QLD,-28.6,151.8
+4000,BRISBANE,QLD,-27.4,153.0
+"""
+
+
+@pytest.fixture(autouse=True)
+def postcode_store(tmp_path):
+    csv_path = tmp_path / "postcodes.csv"
+    csv_path.write_text(POSTCODE_ROWS)
+    previous = composits.csv_file_path, composits.postcode_cache_path
+    composits.configure_postcode_store(csv_path=str(csv_path), cache_path="")
+    yield
+    composits.configure_postcode_store(*previous)
+
+
+def localities(payload):
+    return [(item["value"], item["source"], item["score"])
+            for item in composits.process_json_input(payload).get("Locality", [])]
+
+
+def test_lookup_returns_every_locality_once_in_file_order():
+    assert composits.lookup_localities("4380", composits.get_postcode_index()) == ["AMIENS", "STANTHORPE"]
+
+
+def test_one_locality_per_source_preferring_the_suburb():
+    result = localities(json.loads(composits.json_input))
+    # abrData names STANTHORPE as its suburb; quickbookData has only the postcode
+    assert result == [("STANTHORPE", "abrData", "Low"), ("AMIENS", "quickbookData", "Low")]
+
+
+def test_sources_sharing_a_postcode_agree():
+    payload = {"combinedResults": {"abrData": {"Post Code": "4380"},
+                                   "quickbookData": [{"pcode": "4380"}, {"pcode": "4380"}]}}
+    result = localities(payload)
+    assert [value for value, _, _ in result] == ["AMIENS"] * 3
+    assert {score for _, _, score in result} == {"High"}
@@ -0,0 +1,159 @@
+"""Coalescing, expiry and the SQLite tier of LookupCache."""
+import asyncio
+
+import pytest
+
+from lookup_cache import LookupCache, make_cache_key
+
+
+class Upstream:
+    # Counts calls; each call waits for `delay` and then returns or raises `outcome`
+    def __init__(self, outcome="value", delay=0.05):
+        self.outcome = outcome
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return [self.outcome, self.calls]
+
+
+def test_cancelled_leader_leaves_followers_their_value():
+    async def run():
+        cache, upstream = LookupCache(), Upstream()
+        leader = asyncio.create_task(cache.aget_or_compute("k", upstream))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.aget_or_compute("k", upstream)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers), upstream.calls, cache
+
+    results, calls, cache = asyncio.run(run())
+    assert results == [["value", 1]] * 3
+    assert calls == 1
+    assert cache.stats["coalesced"] == 3
+
+
+def test_cancelled_follower_does_not_disturb_the_others():
+    async def run():
+        cache, upstream = LookupCache(), Upstream()
+        tasks = [asyncio.create_task(cache.aget_or_compute("k", upstream)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True), upstream.calls
+
+    results, calls = asyncio.run(run())
+    assert results[0] == results[2] == ["value", 1]
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert calls == 1
+
+
+def test_failure_reaches_every_caller_from_one_upstream_call():
+    async def run():
+        cache, upstream = LookupCache(), Upstream(TimeoutError("upstream timed out"))
+        results = await asyncio.gather(*(cache.aget_or_compute("k", upstream) for _ in range(4)),
+                                       return_exceptions=True)
+        # Failures are not cached: the next lookup calls upstream again
+        upstream.outcome = "recovered"
+        return results, await cache.aget_or_compute("k", upstream), upstream.calls
+
+    results, retried, calls = asyncio.run(run())
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert retried == ["recovered", 2]
+    assert calls == 2
+
+
+def test_should_cache_filters_what_is_kept():
+    async def run():
+        cache, upstream = LookupCache(), Upstream({"error": "Error: 503"})
+        for _ in range(2):
+            await cache.aget_or_compute("k", upstream, should_cache=lambda value: "error" not in value[0])
+        return upstream.calls
+
+    assert asyncio.run(run()) == 2
+
+
+def test_entries_expire_after_ttl():
+    async def run():
+        cache, upstream = LookupCache(ttl=0.05), Upstream(delay=0)
+        first = await cache.aget_or_compute("k", upstream)
+        cached = await cache.aget_or_compute("k", upstream)
+        await asyncio.sleep(0.1)
+        return first, cached, await cache.aget_or_compute("k", upstream)
+
+    first, cached, refreshed = asyncio.run(run())
+    assert first == cached == ["value", 1]
+    assert refreshed == ["value", 2]
+
+
+def test_lru_keeps_at_most_max_entries():
+    async def run():
+        cache, upstream = LookupCache(max_entries=2), Upstream(delay=0)
+        for key in ("a", "b", "c", "a"):
+            await cache.aget_or_compute(key, upstream)
+        return upstream.calls
+
+    # "a" was evicted by "c", so it is fetched twice
+    assert asyncio.run(run()) == 4
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+
+    async def run():
+        upstream = Upstream(delay=0)
+        await LookupCache(sqlite_path=db_path).aget_or_compute("k", upstream)
+        restarted = LookupCache(sqlite_path=db_path)
+        value = await restarted.aget_or_compute("k", upstream)
+        return value, upstream.calls, restarted.stats
+
+    value, calls, stats = asyncio.run(run())
+    assert value == ["value", 1]
+    assert calls == 1
+    assert stats["disk_hits"] == 1
+
+
+def test_expired_disk_rows_are_purged(tmp_path, monkeypatch):
+    import lookup_cache
+    monkeypatch.setattr(lookup_cache, "DISK_PURGE_SECONDS", 0)
+    db_path = str(tmp_path / "cache.sqlite")
+
+    async def run():
+        cache = LookupCache(ttl=0.05, sqlite_path=db_path)
+        await cache.aget_or_compute("old", Upstream(delay=0))
+        await asyncio.sleep(0.1)
+        await cache.aget_or_compute("new", Upstream(delay=0))
+        return [row[0] for row in cache._db.execute("SELECT key FROM lookup_cache")]
+
+    assert asyncio.run(run()) == ["new"]
+
+
+def test_prefix_invalidation_reaches_both_tiers(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    tpb_key = make_cache_key("tpb", abn="58453256019")
+    lei_key = make_cache_key("lei", legal_name="KBBK")
+
+    async def run():
+        cache, upstream = LookupCache(sqlite_path=db_path), Upstream(delay=0)
+        for key in (tpb_key, lei_key):
+            await cache.aget_or_compute(key, upstream)
+        removed = cache.invalidate(prefix="tpb:")
+        restarted = LookupCache(sqlite_path=db_path)
+        await restarted.aget_or_compute(tpb_key, upstream)
+        await restarted.aget_or_compute(lei_key, upstream)
+        return removed, upstream.calls
+
+    removed, calls = asyncio.run(run())
+    assert removed == 1
+    # Only the invalidated tpb entry is fetched again
+    assert calls == 3
+
+
+def test_cache_keys_ignore_case_whitespace_and_empty_params():
+    assert make_cache_key("tpb", abn=" 58453256019 ", name=None) == make_cache_key("tpb", abn="58453256019", name="")
+    assert make_cache_key("lei", legal_name="KBBK  Solutions") == make_cache_key("lei", legal_name="kbbk solutions")
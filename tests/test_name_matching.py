@@ -0,0 +1,64 @@
+"""Name clustering and how clustered names are scored."""
+import pytest
+
+import composits
+from bench_name_matching import all_pairs_clusters, partition, synthetic_values
+from name_matching import cluster_names, normalise_name
+
+
+@pytest.fixture
+def fuzzy(monkeypatch):
+    monkeypatch.setattr(composits, "FUZZY_NAME_MATCHING", True)
+
+
+def test_punctuation_and_case_share_a_cluster():
+    labels = cluster_names(["KBBK. SOLUTIONS", "KBBK SOLUTIONS", "kbbk solutions"])
+    assert set(labels.values()) == {"KBBK. SOLUTIONS"}
+
+
+def test_one_letter_spelling_difference_shares_a_cluster():
+    labels = cluster_names(["KELLIE BICKERTON", "KELLEE BICKERTON", "BY ALL ACCOUNTS BOOKKEEPING"])
+    assert labels["KELLEE BICKERTON"] == labels["KELLIE BICKERTON"] == "KELLIE BICKERTON"
+    assert labels["BY ALL ACCOUNTS BOOKKEEPING"] == "BY ALL ACCOUNTS BOOKKEEPING"
+
+
+def test_numbered_siblings_stay_apart():
+    labels = cluster_names(["ABC HOLDINGS 1 PTY LTD", "ABC HOLDINGS 2 PTY LTD", "ABC HOLDINGS 01 PTY. LTD.",
+                            "SMITH FAMILY TRUST NO 3", "SMITH FAMILY TRUST NO 4"])
+    assert labels["ABC HOLDINGS 01 PTY. LTD."] == "ABC HOLDINGS 1 PTY LTD"
+    assert labels["ABC HOLDINGS 2 PTY LTD"] == "ABC HOLDINGS 2 PTY LTD"
+    assert labels["SMITH FAMILY TRUST NO 4"] == "SMITH FAMILY TRUST NO 4"
+
+
+@pytest.mark.parametrize("count", [50, 300, 1000])
+def test_index_matches_all_pairs(count):
+    values = synthetic_values(count)
+    labels = cluster_names(values, 0.8)
+    indexed = {normalise_name(value): normalise_name(label) for value, label in labels.items()}
+    assert partition(indexed) == partition(all_pairs_clusters(values, 0.8))
+
+
+def test_abr_business_names_are_split_on_semicolons():
+    payload = {"combinedResults": {"abrData": {"Business Name": "KBBK SOLUTIONS; BY ALL ACCOUNTS;; ;"}}}
+    values = [c["value"] for c in composits.extract_keys_from_sources(payload)["Business Name"]]
+    assert values == ["KBBK SOLUTIONS", "BY ALL ACCOUNTS"]
+
+
+def test_other_sources_are_not_split():
+    payload = {"combinedResults": {"xeroData": {"Business Name": "KBBK SOLUTIONS; BY ALL ACCOUNTS"}}}
+    values = [c["value"] for c in composits.extract_keys_from_sources(payload)["Business Name"]]
+    assert values == ["KBBK SOLUTIONS; BY ALL ACCOUNTS"]
+
+
+def test_cluster_members_score_together(fuzzy):
+    payload = {"combinedResults": {
+        "abrData": {"Business Name": "KBBK SOLUTIONS;KELLEE BICKERTON"},
+        "tpbData": {"Business Name": "KBBK. SOLUTIONS"},
+        "xeroData": {"Business Name": "KELLIE BICKERTON"},
+        "leiData": {"Business Name": "BY ALL ACCOUNTS"},
+    }}
+    scores = {c["value"]: c["score"] for c in composits.process_json_input(payload)["Business Name"]}
+    assert scores["KBBK SOLUTIONS"] == scores["KBBK. SOLUTIONS"]
+    assert scores["KELLIE BICKERTON"] == scores["KELLEE BICKERTON"]
+    assert scores["BY ALL ACCOUNTS"] == "Low"
+    assert scores["KBBK SOLUTIONS"] != "Low"
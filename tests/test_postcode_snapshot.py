@@ -0,0 +1,67 @@
+"""The pickled postcode snapshot is reused only for the CSV it was built from."""
+import os
+import shutil
+
+import pytest
+
+import composits
+from synthetic import write_postcode_csv
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    previous = composits.csv_file_path, composits.postcode_cache_path
+    builds = []
+    build = composits.build_postcode_index
+
+    def counting_build(df):
+        builds.append(len(df))
+        return build(df)
+
+    monkeypatch.setattr(composits, "build_postcode_index", counting_build)
+    yield tmp_path, builds
+    composits.configure_postcode_store(*previous)
+
+
+def load(csv_path, cache_path):
+    composits.configure_postcode_store(csv_path=str(csv_path), cache_path=str(cache_path))
+    return composits.get_postcode_index()
+
+
+def test_unchanged_csv_reuses_snapshot(store):
+    tmp_path, builds = store
+    csv_path, cache_path = tmp_path / "a.csv", tmp_path / "index.pickle"
+    write_postcode_csv(str(csv_path), postcodes=50, rows=100)
+
+    first = load(csv_path, cache_path)
+    assert load(csv_path, cache_path) == first
+    assert len(builds) == 1
+
+
+def test_other_csv_with_same_mtime_rebuilds(store):
+    tmp_path, builds = store
+    csv_path, other_path, cache_path = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "index.pickle"
+    write_postcode_csv(str(csv_path), postcodes=50, rows=100, seed=1)
+    write_postcode_csv(str(other_path), postcodes=50, rows=100, seed=2)
+    stat = os.stat(csv_path)
+    os.utime(other_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    first = load(csv_path, cache_path)
+    assert load(other_path, cache_path) != first
+    assert len(builds) == 2
+
+
+def test_replaced_csv_with_preserved_mtime_rebuilds(store):
+    tmp_path, builds = store
+    csv_path, new_path, cache_path = tmp_path / "a.csv", tmp_path / "new.csv", tmp_path / "index.pickle"
+    write_postcode_csv(str(csv_path), postcodes=50, rows=100)
+    write_postcode_csv(str(new_path), postcodes=60, rows=140, seed=3)
+    first = load(csv_path, cache_path)
+
+    # e.g. cp -p of a new file over the old one
+    stat = os.stat(csv_path)
+    shutil.copyfile(new_path, csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert load(csv_path, cache_path) != first
+    assert len(builds) == 2
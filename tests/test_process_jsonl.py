@@ -0,0 +1,30 @@
+"""process_jsonl: one output line per input record, in order, with errors in place."""
+import json
+
+import pytest
+
+import composits
+
+PAYLOAD = json.dumps({"combinedResults": {"abrData": {"Business Name": "KBBK SOLUTIONS", "State": "QLD"}}})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_invalid_lines_get_error_lines(workers):
+    lines = [PAYLOAD, "{oops", "", "[1, 2]", json.dumps(PAYLOAD), PAYLOAD]
+    results = list(composits.process_jsonl(lines, workers=workers, chunksize=2))
+
+    assert len(results) == 5
+    assert results[0] == results[4] == composits.process_json_input(PAYLOAD)
+    assert results[1]["error"].startswith("Invalid JSON")
+    assert results[2] == results[3] == {"error": "Payload must be a JSON object."}
+
+
+def test_main_writes_error_lines(tmp_path):
+    infile, outfile = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    infile.write_text(f"{PAYLOAD}\n{{oops\n{PAYLOAD}\n")
+    composits.main([str(infile), "-o", str(outfile)])
+
+    results = [json.loads(line) for line in outfile.read_text().splitlines()]
+    assert len(results) == 3
+    assert results[0] == results[2] == composits.process_json_input(PAYLOAD)
+    assert "error" in results[1]
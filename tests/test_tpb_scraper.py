@@ -0,0 +1,93 @@
+"""scrape_public_register against a scripted driver whose form re-renders on RETURN."""
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+import tpb_scraper
+
+RESULTS_HTML = """<div><table><tbody><tr>
+<td>KBBK SOLUTIONS PTY LTD</td><td>KBBK SOLUTIONS</td><td></td><td>Company</td><td></td>
+<td>58453256019</td><td>STANTHORPE</td><td>QLD</td><td data-value="1 EXAMPLE ST STANTHORPE QLD 4380"></td>
+</tr></tbody></table></div>"""
+
+
+class Button:
+    def __init__(self, form):
+        self.form = form
+        self.generation = form.generation
+
+    def _check(self):
+        if self.generation != self.form.generation:
+            raise StaleElementReferenceException("button was re-rendered")
+
+    def is_displayed(self):
+        self._check()
+        return True
+
+    def is_enabled(self):
+        self._check()
+        return True
+
+    def click(self):
+        self._check()
+        self.form.submitted = True
+
+
+class Input:
+    def __init__(self, form):
+        self.form = form
+
+    def send_keys(self, keys):
+        if keys == Keys.RETURN:
+            # The register re-renders its form on RETURN, detaching the old button
+            self.form.generation += 1
+        else:
+            self.form.typed.append(keys)
+
+
+class Results:
+    def get_attribute(self, name):
+        return RESULTS_HTML
+
+
+class ScriptedDriver:
+    def __init__(self):
+        self.generation = 0
+        self.typed = []
+        self.submitted = False
+
+    def get(self, url):
+        self.generation += 1
+
+    def find_element(self, by, value):
+        if by == By.ID:
+            return Input(self)
+        if value == tpb_scraper.FIND_BUTTON_XPATH:
+            return Button(self)
+        if self.submitted and value in (tpb_scraper.RESULT_ROWS_XPATH, tpb_scraper.RESULTS_XPATH):
+            return Results()
+        raise NoSuchElementException(value)
+
+    def find_elements(self, by, value):
+        try:
+            return [self.find_element(by, value)]
+        except NoSuchElementException:
+            return []
+
+
+def test_abn_search_clicks_the_re_rendered_button():
+    driver = ScriptedDriver()
+    result = tpb_scraper.scrape_public_register(driver, abn="58453256019")
+
+    assert driver.typed == ["58453256019"]
+    assert result["message"] == "Records found"
+    assert result["data"][0]["ABN"] == "58453256019"
+    assert result["data"][0]["Postal code"] == "4380"
+
+
+def test_name_search():
+    driver = ScriptedDriver()
+    result = tpb_scraper.scrape_public_register(driver, name="kbbk solutions")
+
+    assert driver.typed == ["Kbbk Solutions"]
+    assert result["data"][0]["Legal name"] == "KBBK SOLUTIONS PTY LTD"
@@ -3,11 +3,43 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException as PageTimeoutException
+import asyncio
+import os
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from bs4 import BeautifulSoup
 import re
+from instrumentation import inc, install_metrics, observe, profile_if_slow, record_error
+from lookup_cache import cache_from_env, make_cache_key
+
+REGISTER_URL = os.environ.get("TPB_REGISTER_URL", "https://myprofile.tpb.gov.au/public-register/")
+# Browsers kept alive for reuse, and how many lookups each serves before it is replaced
+DRIVER_POOL_SIZE = int(os.environ.get("TPB_DRIVER_POOL_SIZE", "2"))
+DRIVER_MAX_USES = int(os.environ.get("TPB_DRIVER_MAX_USES", "50"))
+# Seconds a request waits for a free browser
+DRIVER_CHECKOUT_TIMEOUT = float(os.environ.get("TPB_DRIVER_CHECKOUT_TIMEOUT", "30"))
+# Lookups allowed to wait for a free browser before new ones are rejected with 429
+SCRAPER_MAX_QUEUE = int(os.environ.get("TPB_SCRAPER_MAX_QUEUE", str(2 * DRIVER_POOL_SIZE)))
+# Seconds to wait for the search form, and then for results, before giving up
+PAGE_WAIT_TIMEOUT = float(os.environ.get("TPB_PAGE_WAIT_TIMEOUT", "15"))
+
+FIND_BUTTON_XPATH = '/html/body/div[5]/div/div/div[2]/div[1]/div/div/button[1]'
+RESULTS_XPATH = '/html/body/div[5]/div/div/div[2]/div[2]/div[1]'
+RESULT_ROWS_XPATH = RESULTS_XPATH + '//tbody/tr'
+NO_RESULTS_XPATH = (RESULTS_XPATH + "//*[contains(translate(normalize-space(.), 'NORESULTSFD', 'noresultsfd'), 'no result')"
+                    " or contains(translate(normalize-space(.), 'NORECDSFU', 'norecdsfu'), 'no records found')]")
 
 app = FastAPI()
+# TPB_CACHE_SIZE / TPB_CACHE_TTL / TPB_CACHE_DB
+lookup_cache = cache_from_env("TPB")
+# Lookups run on ScraperRunner threads, so they are profiled there rather than per request
+install_metrics(app, "tpb", cache_stats=lambda: lookup_cache.stats, profile_requests=False)
 
 def get_driver():
     chrome_options = Options()
@@ -16,84 +48,317 @@ def get_driver():
     chrome_options.add_argument("--window-size=1920x1080")
     return webdriver.Chrome(options=chrome_options)
 
+
+class DriverPool:
+    """Bounded pool of reusable headless Chrome drivers.
+
+    At most `size` drivers exist at once. Idle drivers are health-checked on
+    checkout and replaced after `max_uses` lookups.
+    """
+
+    def __init__(self, size, max_uses, factory=get_driver, warmup_url=None):
+        self.size = size
+        self.max_uses = max_uses
+        self.factory = factory
+        self.warmup_url = warmup_url
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses = {}
+        self._closed = False
+
+    def _create(self):
+        driver = self.factory()
+        try:
+            if self.warmup_url:
+                driver.get(self.warmup_url)
+        except Exception:
+            driver.quit()
+            raise
+        self._uses[driver] = 0
+        return driver
+
+    def _is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        self._uses.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting driver: {e}")
+            record_error("quit_driver", e)
+
+    def _take(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create()
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    def _give_back(self, driver):
+        self._uses[driver] = self._uses.get(driver, 0) + 1
+        if self._closed or self._uses[driver] >= self.max_uses:
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def warm_up(self):
+        # Start every driver up front so the first requests skip browser startup
+        started = []
+        try:
+            for _ in range(self.size):
+                self._slots.acquire()
+                try:
+                    started.append(self._take())
+                except Exception:
+                    self._slots.release()
+                    raise
+        except Exception as e:
+            print(f"Error warming up driver pool: {e}")
+            record_error("warm_up_driver_pool", e)
+        finally:
+            for driver in started:
+                self._idle.put(driver)
+                self._slots.release()
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No browser became available")
+        driver = None
+        try:
+            driver = self._take()
+            yield driver
+        finally:
+            if driver is not None:
+                self._give_back(driver)
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class ScraperRunner:
+    """Runs blocking Selenium lookups on a dedicated thread pool, one thread per driver.
+
+    At most `workers + max_queue` lookups are admitted at once; `submit`
+    returns None when that limit is reached.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tpb-scraper")
+        self._admitted = 0
+        self._lock = threading.Lock()
+
+    def _release(self, future):
+        with self._lock:
+            self._admitted -= 1
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._admitted >= self.workers + self.max_queue:
+                return None
+            self._admitted += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+driver_pool = DriverPool(DRIVER_POOL_SIZE, DRIVER_MAX_USES, warmup_url=REGISTER_URL)
+scraper_runner = ScraperRunner(DRIVER_POOL_SIZE, SCRAPER_MAX_QUEUE)
+
+
+def configure_scraper_pool(size, max_uses=DRIVER_MAX_USES, max_queue=None):
+    # Replace the driver pool and its worker threads, e.g. to resize them
+    global driver_pool, scraper_runner
+    old_pool, old_runner = driver_pool, scraper_runner
+    driver_pool = DriverPool(size, max_uses, warmup_url=REGISTER_URL)
+    scraper_runner = ScraperRunner(size, 2 * size if max_queue is None else max_queue)
+    old_runner.shutdown()
+    old_pool.close()
+    return driver_pool
+
+
+@app.on_event("startup")
+def start_driver_pool():
+    driver_pool.warm_up()
+
+
+@app.on_event("shutdown")
+def stop_driver_pool():
+    scraper_runner.shutdown()
+    driver_pool.close()
+
+
+def _click_find_button(wait):
+    # Looked up at click time: typing and RETURN can re-render the form, so a
+    # button found on page load may be detached by now
+    for attempt in range(2):
+        try:
+            wait.until(EC.element_to_be_clickable((By.XPATH, FIND_BUTTON_XPATH))).click()
+            return
+        except StaleElementReferenceException:
+            if attempt:
+                raise
+
+
+def scrape_public_register(driver, abn=None, name=None):
+    # Waits on page state instead of fixed sleeps and records per-phase timings in ms
+    timings = {}
+    wait = WebDriverWait(driver, PAGE_WAIT_TIMEOUT)
+
+    phase_start = time.perf_counter()
+    driver.get(REGISTER_URL)
+    wait.until(EC.element_to_be_clickable((By.XPATH, FIND_BUTTON_XPATH)))
+    timings["page_load"] = round((time.perf_counter() - phase_start) * 1000, 1)
+
+    phase_start = time.perf_counter()
+    if abn:
+        input_field = driver.find_element(By.ID, '1')
+        input_field.send_keys(abn)
+        input_field.send_keys(Keys.RETURN)
+        _click_find_button(wait)
+    elif name:
+        input_field = driver.find_element(By.ID, '0')
+        input_field.send_keys(name.title())
+        _click_find_button(wait)
+    else:
+        raise HTTPException(status_code=400, detail="Invalid input for ABN or Name.")
+    timings["form_submit"] = round((time.perf_counter() - phase_start) * 1000, 1)
+
+    phase_start = time.perf_counter()
+    wait.until(EC.any_of(
+        EC.presence_of_element_located((By.XPATH, RESULT_ROWS_XPATH)),
+        EC.presence_of_element_located((By.XPATH, NO_RESULTS_XPATH)),
+    ))
+    timings["results_render"] = round((time.perf_counter() - phase_start) * 1000, 1)
+
+    phase_start = time.perf_counter()
+    element = driver.find_element(By.XPATH, RESULTS_XPATH)
+    html_content = element.get_attribute('outerHTML')
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    tbody = soup.find('tbody')
+    rows = tbody.find_all('tr') if tbody else []
+
+    if not rows:
+        timings["parse"] = round((time.perf_counter() - phase_start) * 1000, 1)
+        return {"data": [], "message": "No records found", "timings": timings}
+
+    data = []
+    for row in rows:
+        tds = row.find_all('td')
+        if len(tds) >= 8:
+            legal_name = tds[0].text.strip()
+            business_name = tds[1].text.strip()
+            trading_name = tds[1].text.strip()
+            business_type = tds[3].text.strip()
+            abn_value = tds[5].text.strip()
+            suburb = tds[6].text.strip()
+            state = tds[7].text.strip()
+
+            last_td = tds[-1]
+            business_address = last_td.get('data-value', '').strip()
+
+            postal_code_match = re.search(r'\b\d{4}\b', business_address)
+            postal_code = postal_code_match.group(0) if postal_code_match else ""
+
+            structured_row_data = {
+                "Legal name": legal_name,
+                "Business name": business_name,
+                "Trading name": trading_name,
+                "Type": business_type,
+                "ABN": abn_value,
+                "Suburb": suburb,
+                "State": state,
+                "Business address": business_address,
+                "Postal code": postal_code
+            }
+
+            filtered_row_data = {k: v for k, v in structured_row_data.items() if v}
+            data.append(filtered_row_data)
+
+    timings["parse"] = round((time.perf_counter() - phase_start) * 1000, 1)
+    return {"data": data, "message": "Records found", "timings": timings}
+
+
+def _scrape_with_pooled_driver(abn, name):
+    start = time.perf_counter()
+    with profile_if_slow("tpb/scrape"), driver_pool.checkout(timeout=DRIVER_CHECKOUT_TIMEOUT) as driver:
+        observe("stage_seconds", time.perf_counter() - start, stage="driver_checkout")
+        result = scrape_public_register(driver, abn, name)
+    for phase, milliseconds in result["timings"].items():
+        observe("browser_phase_seconds", milliseconds / 1000, phase=phase)
+    return result
+
+
+async def _run_lookup(abn, name):
+    future = scraper_runner.submit(_scrape_with_pooled_driver, abn, name)
+    if future is None:
+        inc("requests_rejected_total", service="tpb")
+        raise HTTPException(status_code=429, detail="Too many lookups in progress, retry shortly.",
+                            headers={"Retry-After": "1"})
+    return await asyncio.wrap_future(future)
+
+
 @app.get("/search/")
 async def search_public_register(abn: str = None, name: str = None):
     if not abn and not name:
         raise HTTPException(status_code=400, detail="Either ABN or Name must be provided.")
 
+    key = make_cache_key("tpb", abn=abn, name=name)
     try:
-        driver = get_driver()
-        url = 'https://myprofile.tpb.gov.au/public-register/'
-        driver.get(url)
-        time.sleep(2)
-
-        if abn:
-            input_field = driver.find_element(By.ID, '1')
-            input_field.send_keys(abn)
-            input_field.send_keys(Keys.RETURN)
-            find_button = driver.find_element(By.XPATH, '/html/body/div[5]/div/div/div[2]/div[1]/div/div/button[1]')
-            find_button.click()
-        elif name:
-            input_field = driver.find_element(By.ID, '0')
-            input_field.send_keys(name.title())
-            find_button = driver.find_element(By.XPATH, '/html/body/div[5]/div/div/div[2]/div[1]/div/div/button[1]')
-            find_button.click()
-        else:
-            driver.quit()
-            raise HTTPException(status_code=400, detail="Invalid input for ABN or Name.")
+        return await lookup_cache.aget_or_compute(key, lambda: _run_lookup(abn, name))
+    except HTTPException:
+        raise
+    except TimeoutError as e:
+        record_error("search_public_register", e)
+        raise HTTPException(status_code=503, detail=f"Error: {str(e)}")
+    except PageTimeoutException as e:
+        record_error("search_public_register", e)
+        raise HTTPException(status_code=504, detail=f"Error: register page did not respond within {PAGE_WAIT_TIMEOUT} seconds")
+    except Exception as e:
+        record_error("search_public_register", e)
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-        time.sleep(2)
 
-        element = driver.find_element(By.XPATH, '/html/body/div[5]/div/div/div[2]/div[2]/div[1]')
-        html_content = element.get_attribute('outerHTML')
-        soup = BeautifulSoup(html_content, 'html.parser')
+@app.get("/admin/cache")
+def cache_stats():
+    return lookup_cache.snapshot_stats()
 
-        tbody = soup.find('tbody')
-        rows = tbody.find_all('tr') if tbody else []
 
-        if not rows:
-            driver.quit()
-            return {"data": [], "message": "No records found"}
-
-        data = []
-        for row in rows:
-            tds = row.find_all('td')
-            if len(tds) >= 8:
-                legal_name = tds[0].text.strip()
-                business_name = tds[1].text.strip()
-                trading_name = tds[1].text.strip()
-                business_type = tds[3].text.strip()
-                abn_value = tds[5].text.strip()
-                suburb = tds[6].text.strip()
-                state = tds[7].text.strip()
-
-                last_td = tds[-1]
-                business_address = last_td.get('data-value', '').strip()
-
-                postal_code_match = re.search(r'\b\d{4}\b', business_address)
-                postal_code = postal_code_match.group(0) if postal_code_match else ""
-
-                structured_row_data = {
-                    "Legal name": legal_name,
-                    "Business name": business_name,
-                    "Trading name": trading_name,
-                    "Type": business_type,
-                    "ABN": abn_value,
-                    "Suburb": suburb,
-                    "State": state,
-                    "Business address": business_address,
-                    "Postal code": postal_code
-                }
-
-                filtered_row_data = {k: v for k, v in structured_row_data.items() if v}
-                data.append(filtered_row_data)
-
-        driver.quit()
-        return {"data": data, "message": "Records found"}
+@app.delete("/admin/cache")
+def invalidate_cache(abn: str = None, name: str = None):
+    # Drops the entry for one lookup, or every TPB entry when no parameters are given
+    if abn or name:
+        removed = lookup_cache.invalidate(key=make_cache_key("tpb", abn=abn, name=name))
+    else:
+        removed = lookup_cache.invalidate(prefix="tpb:")
+    return {"removed": removed}
 
-    except Exception as e:
-        driver.quit()
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn